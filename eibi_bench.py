@@ -0,0 +1,419 @@
+# eibi_tuner benchmarks
+# =====================
+# Synthetic EIBI and ILG schedules, a mock FLRIG server and timings of loading,
+# filtering, highlighting and tuning. Results are written as JSON so runs of
+# different versions can be compared:
+#
+#   python eibi_bench.py run --sizes 10k,100k --output before.json
+#   python eibi_bench.py compare before.json after.json
+#   python eibi_bench.py mock-flrig --port 12345 --latency 0.02 --failure-rate 0.1
+#
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import xmlrpc.client
+from datetime import datetime, timezone
+from xmlrpc.server import SimpleXMLRPCServer
+
+import eibi_core
+from eibi_core import (
+    EibiParser, IlgParser, ScheduleEngine, FlrigClient, FrequencyIndex,
+    bitset_rows, is_schedule_active, percentile,
+)
+
+BENCH_FORMAT_VERSION = 1
+
+# Broadcast bands in kHz, long and medium wave use their channel raster
+BROADCAST_BANDS = [
+    (153, 279, 9), (531, 1602, 9), (2300, 2495, 5), (3200, 3400, 5), (3900, 4000, 5),
+    (4750, 5060, 5), (5900, 6200, 5), (7200, 7450, 5), (9400, 9900, 5), (11600, 12100, 5),
+    (13570, 13870, 5), (15100, 15800, 5), (17480, 17900, 5), (18900, 19020, 5),
+    (21450, 21850, 5), (25670, 26100, 5),
+]
+BAND_WEIGHTS = [1, 6, 1, 1, 1, 2, 8, 6, 8, 7, 5, 6, 4, 1, 2, 1]
+ITU_CODES = ["ALB", "AUS", "B", "CAN", "CHN", "CUB", "D", "E", "EGY", "F", "G", "IND", "IRN", "J", "KOR", "RUS", "TUR", "USA", "VTN"]
+LANGUAGES = {"E": "English", "F": "French", "G": "German", "S": "Spanish", "A": "Arabic", "C": "Chinese", "R": "Russian", "-TS": "Time signal"}
+TARGETS = ["Eu", "WEu", "CEu", "EEu", "NAm", "CAm", "SAm", "Af", "WAf", "EAf", "NAf", "ME", "As", "SAs", "EAs", "SEA", "Oc"]
+DAYS = ["", "", "", "", "Mo-Fr", "Sa", "Su", "Sa-Su", "1245", "Mo-Sa", "irr"]
+
+def _random_frequency(rng):
+    low, high, step = rng.choices(BROADCAST_BANDS, BAND_WEIGHTS)[0]
+    return low + step * rng.randrange((high - low) // step + 1)
+
+def _random_slots(rng):
+    # (start, end) as half hour slots of the day, mostly short broadcasts
+    if rng.random() < 0.08:
+        return 0, 48
+    start = rng.randrange(48)
+    return start, start + rng.choice([1, 1, 2, 2, 2, 3, 4, 6, 8])
+
+def _slot_time(slot):
+    slot %= 48
+    return f"{slot // 2:02d}{30 * (slot % 2):02d}"
+
+def generate_eibi(path, rows, seed=1):
+    # EIBI "sked" CSV: semicolon separated, header with column widths
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("kHz:75;Time(UTC):93;Days:59;ITU:49;Station:201;Lng:49;Target:62;Remarks:135;P:35;Start:60;Stop:60;\n")
+        for _ in range(rows):
+            start, end = _random_slots(rng)
+            time_range = "0000-2400" if end - start == 48 else f"{_slot_time(start)}-{_slot_time(end)}"
+            itu = rng.choice(ITU_CODES)
+            f.write(f"{_random_frequency(rng)};{time_range};{rng.choice(DAYS)};{itu};"
+                    f"{itu} Radio {rng.randrange(1, 400)};{rng.choice(list(LANGUAGES))};{rng.choice(TARGETS)};"
+                    f"{rng.choice(['', '', 'Site ' + str(rng.randrange(1, 60)), 'DRM'])};1;;\n")
+
+def generate_ilg(path, rows, seed=2):
+    # ILG CSV: comment lines, a header with all ILG columns and a 48 slot grid per row
+    rng = random.Random(seed)
+    columns = [
+        "FREQkhz", "STN", "CALL SIGN - NETWORK IDENTIFICATION", "TIMES:UTC", "1=Sun", "LANGUAGE", "TARGET",
+        "COUNTRY OF TRANSM.", "24 HOURS TIMES BY LINES IN 30 MINUTE UTC STEPS", "AZI", "REMARKS/COMMENT",
+        "CIRAFZONES - RECEPTION ZONES", "POSITION: LONGI,LATI", "M", "B", "S", "YY,", "Start", "Stop",
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("## ILG - International Listening Guide, synthetic data\n")
+        f.write("### generated by eibi_bench.py\n")
+        f.write(";".join(columns) + "\n")
+        for _ in range(rows):
+            start, end = _random_slots(rng)
+            grid = "".join("X" if start <= slot < end or slot < end - 48 else "." for slot in range(48))
+            f.write(";".join([
+                str(_random_frequency(rng)), rng.choice(ITU_CODES), f"NET {rng.randrange(1, 300)}",
+                f"{_slot_time(start)}-{_slot_time(end)}" if end - start < 48 else "0000-2400",
+                rng.choice(["", "", "1234567", "17", "23456", "7"]), rng.choice(list(LANGUAGES.values())),
+                rng.choice(TARGETS).upper(), rng.choice(ITU_CODES), grid, str(rng.randrange(360)), "",
+                "27,28", "10E00,50N00", "", "", "", "", "", "",
+            ]) + "\n")
+
+class _ThreadingXMLRPCServer(socketserver.ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+
+class MockFlrig:
+    # Local stand-in for FLRIG answering rig.get_vfo and main.set_frequency
+    # (also inside system.multicall). Every call is delayed by latency plus a
+    # random jitter; with probability failure_rate it fails instead, either
+    # with an XML-RPC fault or by hanging longer than any client timeout.
+    def __init__(self, port=0, latency=0.0, jitter=0.0, failure_rate=0.0, failure_mode="fault", seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self.frequency_hz = 6070000.0
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = _ThreadingXMLRPCServer(("127.0.0.1", port), logRequests=False, allow_none=True)
+        self.port = self.server.server_address[1]
+        self.server.register_multicall_functions()
+        self.server.register_function(self.get_vfo, "rig.get_vfo")
+        self.server.register_function(self.set_frequency, "main.set_frequency")
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _call(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            failing = self._rng.random() < self.failure_rate
+        if failing and self.failure_mode == "hang":
+            delay += 3600
+        time.sleep(delay)
+        if failing:
+            raise xmlrpc.client.Fault(1, "injected failure")
+
+    def get_vfo(self):
+        self._call()
+        return str(int(self.frequency_hz))
+
+    def set_frequency(self, frequency_hz):
+        self._call()
+        self.frequency_hz = float(frequency_hz)
+        return 0
+
+def parse_size(text):
+    # "10k" -> 10000, "1M" -> 1000000
+    text = text.strip().lower()
+    factor = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * factor)
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - started, result
+
+class BenchmarkRun:
+    def __init__(self, data_dir, quick=False):
+        self.data_dir = data_dir
+        self.repeat = 1 if quick else 3
+        self.results = []
+
+    def record(self, name, file_type, rows, seconds, **extra):
+        result = {"name": name, "file_type": file_type, "rows": rows, "seconds": round(seconds, 9)}
+        result.update(extra)
+        self.results.append(result)
+        print(f"{name:<24} {file_type or '':<5} {rows:>9} rows {seconds * 1000:>11.3f} ms", file=sys.stderr)
+
+    def data_file(self, file_type, rows):
+        # Generated once per size and reused by later runs with the same data dir
+        path = os.path.join(self.data_dir, f"{file_type.lower()}_{rows}.csv")
+        if not os.path.exists(path):
+            generate = generate_eibi if file_type == "EIBI" else generate_ilg
+            generate(path + ".tmp", rows)
+            os.replace(path + ".tmp", path)
+        return path
+
+    def best_of(self, function, *args):
+        # Shortest of self.repeat runs, with the result of the last one
+        best = None
+        for _ in range(self.repeat):
+            seconds, result = timed(function, *args)
+            best = seconds if best is None else min(best, seconds)
+        return best, result
+
+    def bench_load(self, file_type, rows):
+        path = self.data_file(file_type, rows)
+        parser_class = EibiParser if file_type == "EIBI" else IlgParser
+
+        def parse():
+            engine = ScheduleEngine()
+            parser = parser_class(path)
+            engine.start(parser)
+            for chunk in parser.iter_chunks():
+                for data_item, schedule in chunk:
+                    engine.table.append(data_item, schedule)
+            return engine, parser
+
+        shutil.rmtree(eibi_core.CACHE_DIR, ignore_errors=True)
+        seconds, (engine, parser) = self.best_of(parse)
+        self.record("load.parse", file_type, rows, seconds, rows_per_second=round(rows / seconds), bytes=os.path.getsize(path))
+        workers = os.cpu_count() or 1
+        if workers > 1:
+            def parse_parallel():
+                engine = ScheduleEngine()
+                engine.workers = workers
+                parser = parser_class(path)
+                engine.start(parser)
+                for _ in engine.parse_steps(parser, block=True):
+                    pass
+
+            seconds, _ = self.best_of(parse_parallel)
+            self.record("load.parse_parallel", file_type, rows, seconds, rows_per_second=round(rows / seconds), workers=workers)
+        seconds, _ = timed(eibi_core.save_table_cache, parser, engine.table)
+        self.record("load.cache_save", file_type, rows, seconds)
+        seconds, _ = self.best_of(lambda: eibi_core.load_table_cache(parser_class(path)))
+        self.record("load.cache_load", file_type, rows, seconds)
+        seconds, _ = self.best_of(lambda: eibi_core.ActivityIndex(engine.table.schedule_times()))
+        self.record("load.activity_index", file_type, rows, seconds)
+        engine.finish(parser)
+        return engine
+
+    def bench_filter(self, engine, file_type, rows):
+        rng = random.Random(3)
+        times = [(rng.randrange(7), rng.randrange(24 * 60)) for _ in range(100)]
+        seconds, _ = self.best_of(lambda: [bitset_rows(engine.activity_index.active_at(*at)) for at in times])
+        self.record("filter.active", file_type, rows, seconds / len(times), per="query")
+
+        def target_filter():
+            engine.target_filter_cache = {}
+            return [engine.filtered_bits(None, target) for target in ("eu", "af", "nam", "as")]
+        seconds, _ = self.best_of(target_filter)
+        self.record("filter.target", file_type, rows, seconds / 4, per="query")
+
+        render_cache = engine.render_cache()
+        seconds, _ = timed(render_cache.search_keys)
+        self.record("filter.search_keys", file_type, rows, seconds)
+        terms = ["radio 1", "germ", "eu", "site 3", "zzz"]
+        all_rows = (1 << len(engine.table)) - 1
+        seconds, _ = self.best_of(lambda: [render_cache.search(term, all_rows) for term in terms])
+        self.record("filter.search", file_type, rows, seconds / len(terms), per="query")
+
+        frequencies = [_random_frequency(rng) for _ in range(200)]
+        seconds, _ = self.best_of(lambda: [engine.query(times[0], "", "", khz, 10) for khz in frequencies])
+        self.record("filter.query_window", file_type, rows, seconds / len(frequencies), per="query")
+
+        seconds, _ = timed(engine.slot_codes)
+        self.record("filter.slot_codes", file_type, rows, seconds)
+        seconds, _ = self.best_of(lambda: [engine.occupancy(100, target) for target in ("", "eu", "af")])
+        self.record("filter.occupancy", file_type, rows, seconds / 3, per="query")
+
+    def bench_highlight(self, engine, file_type, rows):
+        # What update_listbox_display and update_view_mode_display compute for the list
+        table = engine.table
+        seconds, frequency_index = self.best_of(lambda: FrequencyIndex([table.khz[row] for row in range(len(table))]))
+        self.record("highlight.index_build", file_type, rows, seconds)
+        rng = random.Random(4)
+        targets = [_random_frequency(rng) + rng.choice([0, 0, 0.5]) for _ in range(1000)]
+        weekday, minute = 2, 12 * 60
+
+        def highlight():
+            styles = {}
+            for khz in targets:
+                matches = frequency_index.exact_matches(khz)
+                for row in matches:
+                    styles[row] = is_schedule_active(table.schedule(row), weekday, minute)
+                if not matches:
+                    frequency_index.insertion_point(khz)
+            return styles
+        seconds, _ = self.best_of(highlight)
+        self.record("highlight.update", file_type, rows, seconds / len(targets), per="update")
+        render_cache = engine.render_cache()
+        window = range(0, len(table), max(len(table) // 1000, 1))
+        seconds, _ = timed(lambda: [render_cache.line(row) for row in window])
+        self.record("highlight.render_lines", file_type, rows, seconds / len(window), per="line")
+
+    def bench_tune(self, requests, latency, failure_rate):
+        # Round trips of click-to-tune (set_frequency with confirming get_vfo)
+        mock = MockFlrig(latency=latency, failure_rate=failure_rate).start()
+        round_trips, failures = [], 0
+        client = FlrigClient("127.0.0.1", mock.port, timeout=1.0)
+        try:
+            for i in range(requests):
+                started = time.perf_counter()
+                try:
+                    client.set_frequency(6000000 + 5000 * (i % 100))
+                    round_trips.append(time.perf_counter() - started)
+                except (xmlrpc.client.Fault, OSError):
+                    failures += 1
+                    client.close()
+                    client = FlrigClient("127.0.0.1", mock.port, timeout=1.0)
+        finally:
+            client.close()
+            mock.stop()
+        round_trips.sort()
+        self.record("tune.round_trip", None, 0, percentile(round_trips, 50), requests=requests, failures=failures,
+                    latency_ms=latency * 1000, failure_rate=failure_rate,
+                    p50_ms=round(percentile(round_trips, 50) * 1000, 3), p99_ms=round(percentile(round_trips, 99) * 1000, 3))
+
+def run_benchmarks(args):
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    only = set(args.only.split(",")) if args.only else {"load", "filter", "highlight", "tune"}
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="eibi_bench_")
+    os.makedirs(data_dir, exist_ok=True)
+    # Never touch the user's parse cache
+    eibi_core.CACHE_DIR = os.path.join(data_dir, "cache")
+    run = BenchmarkRun(data_dir, args.quick)
+    try:
+        # Messages of the code under test must not end up in the JSON on stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            for rows in sizes:
+                for file_type in ("EIBI", "ILG"):
+                    if only & {"load", "filter", "highlight"}:
+                        engine = run.bench_load(file_type, rows)
+                        if "filter" in only:
+                            run.bench_filter(engine, file_type, rows)
+                        if "highlight" in only:
+                            run.bench_highlight(engine, file_type, rows)
+            if "tune" in only:
+                requests = 50 if args.quick else 200
+                run.bench_tune(requests, 0.0, 0.0)
+                run.bench_tune(requests, 0.005, 0.0)
+                run.bench_tune(requests, 0.005, 0.1)
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    document = {
+        "format": BENCH_FORMAT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": sizes,
+        "results": run.results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=1)
+    else:
+        json.dump(document, sys.stdout, indent=1)
+        print()
+    return 0
+
+def _result_key(result):
+    return (result["name"], result["file_type"], result["rows"], result.get("latency_ms"), result.get("failure_rate"))
+
+def run_compare(args):
+    # Time of every benchmark in the new run relative to the old one
+    documents = []
+    for path in (args.old, args.new):
+        with open(path, encoding="utf-8") as f:
+            documents.append({_result_key(result): result for result in json.load(f)["results"]})
+    old_results, new_results = documents
+    for key, new_result in new_results.items():
+        old_result = old_results.get(key)
+        if old_result is None or not old_result["seconds"]:
+            continue
+        name, file_type, rows = key[:3]
+        ratio = new_result["seconds"] / old_result["seconds"]
+        print(f"{name:<24} {file_type or '':<5} {rows:>9} {old_result['seconds'] * 1000:>11.3f} ms -> {new_result['seconds'] * 1000:>11.3f} ms  x{ratio:.2f}")
+    return 0
+
+def run_generate(args):
+    generate = generate_eibi if args.type == "eibi" else generate_ilg
+    generate(args.output, parse_size(args.rows), args.seed)
+    return 0
+
+def run_mock_flrig(args):
+    mock = MockFlrig(args.port, args.latency, args.jitter, args.failure_rate, args.failure_mode).start()
+    print(f"Mock FLRIG listening on 127.0.0.1:{mock.port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
+    return 0
+
+def main(argv=None):
+    argument_parser = argparse.ArgumentParser(prog="eibi_bench", description="Benchmarks of eibi_tuner.")
+    commands = argument_parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmarks and print the results as JSON")
+    run.add_argument("--sizes", default="10k,100k", help="rows per generated file, e.g. 10k,100k,1M (default 10k,100k)")
+    run.add_argument("--only", help="comma separated subset of load,filter,highlight,tune")
+    run.add_argument("--data-dir", help="keep the generated files here and reuse them on later runs")
+    run.add_argument("--quick", action="store_true", help="single repetitions and fewer tune requests")
+    run.add_argument("--output", help="write the results to this file instead of stdout")
+    run.set_defaults(handler=run_benchmarks)
+
+    compare = commands.add_parser("compare", help="compare the results of two runs")
+    compare.add_argument("old")
+    compare.add_argument("new")
+    compare.set_defaults(handler=run_compare)
+
+    generate = commands.add_parser("generate", help="write a synthetic schedule file")
+    generate.add_argument("--type", choices=["eibi", "ilg"], default="eibi")
+    generate.add_argument("--rows", default="10k", help="number of entries, e.g. 10k or 1M")
+    generate.add_argument("--seed", type=int, default=1)
+    generate.add_argument("--output", required=True)
+    generate.set_defaults(handler=run_generate)
+
+    mock = commands.add_parser("mock-flrig", help="run a mock FLRIG XML-RPC server")
+    mock.add_argument("--port", type=int, default=12345)
+    mock.add_argument("--latency", type=float, default=0.0, help="seconds added to every call")
+    mock.add_argument("--jitter", type=float, default=0.0, help="random extra seconds, up to this much")
+    mock.add_argument("--failure-rate", type=float, default=0.0, help="share of calls that fail, 0 to 1")
+    mock.add_argument("--failure-mode", choices=["fault", "hang"], default="fault")
+    mock.set_defaults(handler=run_mock_flrig)
+
+    args = argument_parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2699 @@
+# eibi_tuner core
+# ===============
+# Loading, schedule evaluation, indexes and FLRIG control of eibi_tuner,
+# without tkinter. Used by the GUI in eibi_tuner.py and by the command line:
+#
+#   python eibi_core.py query --file sked.csv --active --freq 6070 --json
+#
+import argparse
+import array
+import asyncio
+import bisect
+import collections
+import concurrent.futures
+import contextlib
+import csv
+import hashlib
+import heapq
+import io
+import itertools
+import json
+import math
+import mmap
+import operator
+import os
+import queue
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.parse
+import xmlrpc.client
+from datetime import datetime, timezone
+
+numpy = False # Optional, imported on first use by load_numpy()
+
+CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".eibi_tuner")
+CACHE_DIR = os.path.join(CONFIG_DIR, "cache") # Parsed schedule files, see save_table_cache
+CACHE_MAGIC = b"EIBI_TUNER_CACHE"
+CACHE_VERSION = 4
+
+FLRIG_TIMEOUT = 2.0 # Seconds before an FLRIG request is given up
+# Adaptive rig.get_vfo polling, see PollScheduler
+FLRIG_POLL_FAST = 0.15 # Seconds between polls while the rig frequency is changing
+FLRIG_POLL_HOLD = 1.0 # Seconds the fast rate is kept after the last change or tune command
+FLRIG_POLL_BACKOFF = 2.0 # Factor the pause grows by with every poll after that
+FLRIG_POLL_STABLE_MAX = 2.0 # Longest pause between polls of a rig on a steady frequency
+FLRIG_POLL_UNREACHABLE_MAX = 10.0 # Longest pause between attempts to reach FLRIG
+FLRIG_POLL_RATE_WINDOW = 10.0 # Seconds of recent polls the reported poll rate is taken over
+
+# Upper bounds (ms) of the latency histogram buckets kept by Timings
+TIMING_BUCKETS_MS = (0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, math.inf)
+
+class TimingStat:
+    # Count, total, maximum and a latency histogram of one measured operation
+    __slots__ = ("count", "total", "maximum", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.buckets = [0] * len(TIMING_BUCKETS_MS)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+        self.buckets[bisect.bisect_left(TIMING_BUCKETS_MS, seconds * 1000)] += 1
+
+    def percentile_ms(self, percent):
+        # Upper bound of the bucket holding the percentile, at most the maximum
+        rank = max(math.ceil(percent / 100 * self.count), 1)
+        seen = 0
+        for bound, bucket_count in zip(TIMING_BUCKETS_MS, self.buckets):
+            seen += bucket_count
+            if seen >= rank:
+                return min(bound, self.maximum * 1000)
+        return self.maximum * 1000
+
+class Timings:
+    # Switchable timers of the hot paths (parsing, list drawing, filtering,
+    # highlighting, FLRIG calls). While disabled, measure() hands out a shared
+    # no-op context and add() returns at once, so the instrumented code pays
+    # next to nothing. Safe to use from the FLRIG threads.
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stats = {} # Name -> TimingStat
+        self._lock = threading.Lock()
+        self._disabled_timer = contextlib.nullcontext()
+
+    def add(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = TimingStat()
+            stat.add(seconds)
+
+    @contextlib.contextmanager
+    def _timer(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def measure(self, name):
+        # with TIMINGS.measure("filter"): ...
+        if not self.enabled:
+            return self._disabled_timer
+        return self._timer(name)
+
+    def reset(self):
+        with self._lock:
+            self.stats = {}
+
+    def summary(self):
+        # One dict per operation, sorted by name, times in milliseconds
+        with self._lock:
+            stats = sorted(self.stats.items())
+            rows = []
+            for name, stat in stats:
+                rows.append({
+                    "name": name,
+                    "count": stat.count,
+                    "total_ms": round(stat.total * 1000, 3),
+                    "mean_ms": round(stat.total * 1000 / stat.count, 3),
+                    "p50_ms": round(stat.percentile_ms(50), 3),
+                    "p90_ms": round(stat.percentile_ms(90), 3),
+                    "p99_ms": round(stat.percentile_ms(99), 3),
+                    "max_ms": round(stat.maximum * 1000, 3),
+                    "histogram": {("inf" if bound == math.inf else str(bound)): count for bound, count in zip(TIMING_BUCKETS_MS, stat.buckets) if count},
+                })
+        return rows
+
+    def to_json(self):
+        return json.dumps({"bucket_upper_bounds_ms": [str(bound) for bound in TIMING_BUCKETS_MS], "timings": self.summary()}, indent=1)
+
+    def to_csv(self):
+        # One line per operation, the histogram as one column per bucket
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        bucket_names = [("le_inf" if bound == math.inf else f"le_{bound}ms") for bound in TIMING_BUCKETS_MS]
+        writer.writerow(["name", "count", "total_ms", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"] + bucket_names)
+        with self._lock:
+            buckets = {name: list(stat.buckets) for name, stat in self.stats.items()}
+        for row in self.summary():
+            writer.writerow([row[key] for key in ("name", "count", "total_ms", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms")] + buckets[row["name"]])
+        return output.getvalue()
+
+# Shared by all modules, switched on with EIBI_TUNER_TIMINGS=1 or from the GUI
+TIMINGS = Timings(enabled=os.environ.get("EIBI_TUNER_TIMINGS", "") not in ("", "0"))
+
+DAY_NUMBERS = {
+    "Mo": 0, "Tu": 1, "We": 2, "Th": 3, "Fr": 4, "Sa": 5, "Su": 6,
+    "1": 0, "2": 1, "3": 2, "4": 3, "5": 4, "6": 5, "7": 6
+}
+DAY_NAMES = ["Mo", "Tu", "We", "Th", "Fr", "Sa", "Su"]
+ALL_DAYS_MASK = 0b1111111 # Bit n set = active on weekday n (0 = Monday)
+MINUTES_PER_DAY = 24 * 60
+
+# A schedule compiled once at load time: a weekday bit mask, the start and end
+# minute of the UTC day and, for schedules that could not be parsed, the reason.
+# Schedules with an error are never active.
+Schedule = collections.namedtuple("Schedule", "day_mask start_minute end_minute error")
+
+def _parse_time_range(time_range_str):
+    if not time_range_str or time_range_str == "0000-2400":
+        return 0, MINUTES_PER_DAY
+    start_str, end_str = time_range_str.split('-')
+    start_minutes = int(start_str[:2]) * 60 + int(start_str[2:])
+    end_minutes = int(end_str[:2]) * 60 + int(end_str[2:])
+    return start_minutes, end_minutes
+
+def _parse_day_mask(days_str):
+    if not days_str:
+        return ALL_DAYS_MASK # Empty days string means all days
+
+    day_mask = 0
+    # Handle ranges like We-Mo or 1-7
+    if '-' in days_str:
+        start_day_str, end_day_str = days_str.split('-')
+        start_day_int = DAY_NUMBERS.get(start_day_str)
+        end_day_int = DAY_NUMBERS.get(end_day_str)
+        if start_day_int is not None and end_day_int is not None:
+            if start_day_int <= end_day_int:
+                days = range(start_day_int, end_day_int + 1)
+            else: # Overnight range, e.g., Friday to Monday
+                days = list(range(start_day_int, 7)) + list(range(0, end_day_int + 1))
+            for day in days:
+                day_mask |= 1 << day
+    else: # Handles single day abbreviations, or sequences like '1234567' or '.2.4.6.'
+        for char in days_str:
+            if char.isdigit() and char in DAY_NUMBERS:
+                day_mask |= 1 << DAY_NUMBERS[char]
+
+        # If no digit days were found, try to parse the whole string as an abbreviation
+        if not day_mask:
+            day_int = DAY_NUMBERS.get(days_str.strip())
+            if day_int is not None:
+                day_mask = 1 << day_int
+    return day_mask
+
+def compile_schedule(time_range_str, days_str):
+    try:
+        start_minutes, end_minutes = _parse_time_range(time_range_str)
+    except (ValueError, IndexError):
+        return Schedule(0, 0, 0, f"bad time range '{time_range_str}'")
+    try:
+        day_mask = _parse_day_mask(days_str)
+    except ValueError:
+        day_mask = 0
+    if not day_mask:
+        return Schedule(0, start_minutes, end_minutes, f"bad days '{days_str}'")
+    return Schedule(day_mask, start_minutes, end_minutes, None)
+
+def is_schedule_active(schedule, weekday, minute_of_day):
+    if not (schedule.day_mask >> weekday) & 1:
+        return False
+    if schedule.start_minute <= schedule.end_minute:
+        return schedule.start_minute <= minute_of_day < schedule.end_minute
+    # Overnight schedule, e.g., 2300-0100
+    return minute_of_day >= schedule.start_minute or minute_of_day < schedule.end_minute
+
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+# Row numbers of the set bits of every byte value, to expand bitsets quickly
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+def bitset_rows(bits):
+    # Sorted row numbers of the set bits of a Python int used as a bitset
+    rows = []
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for byte_index, byte in enumerate(data):
+        if byte:
+            base = byte_index * 8
+            rows.extend(base + bit for bit in _BYTE_BITS[byte])
+    return rows
+
+def rows_bitset(rows, row_count):
+    data = bytearray((row_count + 7) // 8)
+    for row in rows:
+        data[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(data, "little")
+
+def schedule_week_intervals(schedule):
+    # [start, end) minutes of the week (0 = Monday 0000 UTC) in which a schedule
+    # is active, following the same rules as is_schedule_active
+    intervals = []
+    for weekday in range(7):
+        if not (schedule.day_mask >> weekday) & 1:
+            continue
+        day_start = weekday * MINUTES_PER_DAY
+        start = min(schedule.start_minute, MINUTES_PER_DAY)
+        end = min(schedule.end_minute, MINUTES_PER_DAY)
+        if schedule.start_minute <= schedule.end_minute:
+            intervals.append((day_start + start, day_start + end))
+        else: # Overnight schedule, the part after midnight belongs to the same weekday
+            intervals.append((day_start, day_start + end))
+            intervals.append((day_start + start, day_start + MINUTES_PER_DAY))
+    return [(start, end) for start, end in intervals if start < end]
+
+# Half hour slots of the UTC day, as in the time grid of ILG files. A slot
+# mask has bit n set if an entry is on air in slot n (minutes 30n .. 30n + 29)
+# on the days it is scheduled.
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = MINUTES_PER_DAY // SLOT_MINUTES
+GRID_INACTIVE_CHARS = " .-_0" # Grid characters of slots off air, any other character is on air
+
+def parse_slot_grid(grid_str):
+    # Slot mask of an ILG time grid, one character per slot from 0000 UTC,
+    # e.g. "...X....", None if the text is not a grid of SLOTS_PER_DAY slots
+    if len(grid_str) != SLOTS_PER_DAY:
+        return None
+    slot_mask = 0
+    for slot, char in enumerate(grid_str):
+        if char not in GRID_INACTIVE_CHARS:
+            slot_mask |= 1 << slot
+    return slot_mask
+
+def schedule_slot_mask(start_minute, end_minute):
+    # Slot mask of a time range, a slot counts if the range covers any part
+    # of it. Overnight ranges cover the end and the start of the day.
+    if start_minute <= end_minute:
+        ranges = [(start_minute, min(end_minute, MINUTES_PER_DAY))]
+    else:
+        ranges = [(start_minute, MINUTES_PER_DAY), (0, end_minute)]
+    slot_mask = 0
+    for start, end in ranges:
+        for slot in range(start // SLOT_MINUTES, (end + SLOT_MINUTES - 1) // SLOT_MINUTES):
+            slot_mask |= 1 << slot
+    return slot_mask
+
+def load_numpy():
+    # The numpy module, None if it is not installed. Only the occupancy
+    # heatmap uses it, so the import waits until the heatmap is counted
+    # instead of slowing down every start of the GUI and the command line.
+    global numpy
+    if numpy is False:
+        try:
+            import numpy
+        except ImportError: # The occupancy heatmap is then counted in plain Python
+            numpy = None
+    return numpy
+
+def format_week_minute(week_minute):
+    # 5 * 1440 + 1080 -> "Sa 1800", minutes outside the week wrap around
+    weekday, minute_of_day = divmod(week_minute % MINUTES_PER_WEEK, MINUTES_PER_DAY)
+    return f"{DAY_NAMES[weekday]} {minute_of_day // 60:02d}{minute_of_day % 60:02d}"
+
+def format_minutes(minutes):
+    # 45 -> "45 min", 125 -> "2 h 05 min", 1580 -> "1 d 2 h"
+    if minutes < 60:
+        return f"{minutes} min"
+    if minutes < MINUTES_PER_DAY:
+        return f"{minutes // 60} h {minutes % 60:02d} min"
+    return f"{minutes // MINUTES_PER_DAY} d {minutes % MINUTES_PER_DAY // 60} h"
+
+def parse_week_time(text):
+    # "Sa 1800" -> (5, 1080), "1800" -> (None, 1080); None if text cannot be parsed
+    parts = text.split()
+    if not 1 <= len(parts) <= 2:
+        return None
+    weekday = None
+    if len(parts) == 2:
+        weekday = DAY_NUMBERS.get(parts[0][:2].capitalize())
+        if weekday is None:
+            return None
+    hhmm = parts[-1].replace(":", "")
+    if len(hhmm) != 4 or not hhmm.isdigit() or int(hhmm[:2]) > 23 or int(hhmm[2:]) > 59:
+        return None
+    return weekday, int(hhmm[:2]) * 60 + int(hhmm[2:])
+
+class ActivityIndex:
+    # Splits the week into segments at every schedule start and end and keeps
+    # the set of rows on air during each segment as a bitset (Python int), so
+    # "what is active at time T" is a bisection instead of a pass over all rows.
+    # schedules gives (day mask, start minute, end minute, ...) per row, e.g.
+    # Schedule tuples or ScheduleTable.schedule_times().
+    def __init__(self, schedules):
+        # Most rows share their days and times with many others, the intervals
+        # are worked out once per distinct schedule
+        rows_by_schedule = collections.defaultdict(list)
+        row = -1
+        for row, schedule in enumerate(schedules):
+            rows_by_schedule[tuple(schedule[:3])].append(row)
+        self.row_count = row + 1
+
+        starting = collections.defaultdict(int) # Week minute -> bitset of the rows going on air
+        ending = collections.defaultdict(int)
+        for (day_mask, start_minute, end_minute), rows in rows_by_schedule.items():
+            intervals = schedule_week_intervals(Schedule(day_mask, start_minute, end_minute, None))
+            if not intervals:
+                continue
+            bits = rows_bitset(rows, self.row_count)
+            for start, end in intervals:
+                starting[start] |= bits
+                ending[end] |= bits
+
+        self.starts = sorted(set(starting) | set(ending) | {0})
+        self.active = []
+        bits = 0
+        for minute in self.starts:
+            bits = (bits & ~ending.get(minute, 0)) | starting.get(minute, 0)
+            self.active.append(bits)
+
+    def packed_segments(self):
+        # The bitsets of all segments as one byte array, each padded to the
+        # same length, for the parse cache
+        width = self.row_count // 8 + 1
+        packed = array.array('B')
+        for bits in self.active:
+            packed.frombytes(bits.to_bytes(width, "little"))
+        return packed
+
+    def load_segments(self, row_count, starts, packed):
+        # Undoes packed_segments()
+        width = row_count // 8 + 1
+        self.row_count = row_count
+        self.starts = list(starts)
+        self.active = [int.from_bytes(packed[offset:offset + width], "little") for offset in range(0, len(packed), width)]
+
+    def _segment(self, week_minute):
+        return bisect.bisect_right(self.starts, week_minute % MINUTES_PER_WEEK) - 1
+
+    def _split(self, week_minute):
+        # Index of the segment starting at week_minute, the segment around it is
+        # split in two if needed
+        segment = bisect.bisect_left(self.starts, week_minute)
+        if week_minute < MINUTES_PER_WEEK and (segment == len(self.starts) or self.starts[segment] != week_minute):
+            self.starts.insert(segment, week_minute)
+            self.active.insert(segment, self.active[segment - 1])
+        return segment
+
+    def add_rows(self, first_row, schedules):
+        # Adds the rows first_row, first_row + 1, ... appended to the table
+        # after the index was built, without building it again
+        for row, schedule in enumerate(schedules, first_row):
+            self.row_count = row + 1
+            bit = 1 << row
+            for start, end in schedule_week_intervals(schedule):
+                first_segment = self._split(start)
+                for segment in range(first_segment, self._split(end)):
+                    self.active[segment] |= bit
+
+    def active_at(self, weekday, minute_of_day):
+        # Bitset of the rows active at the given UTC weekday and minute
+        return self.active[self._segment(weekday * MINUTES_PER_DAY + minute_of_day)]
+
+
+
+LOAD_CHUNK_SIZE = 2000 # Rows parsed per step while loading a file
+PARALLEL_LOAD_MIN_BYTES = 32 << 20 # Larger files are parsed by a pool of worker processes
+PARALLEL_CHUNK_BYTES = 8 << 20 # Bytes of a file parsed by one worker task
+SEARCH_KEYS_STEP = 1000 # Search keys made per step after a file is loaded
+OCCUPANCY_BIN_KHZ = 100 # Default width of the frequency bins of the occupancy heatmap
+
+# Time grid of an ILG file, kept in the table for the occupancy heatmap
+ILG_GRID_COLUMN = "24 HOURS TIMES BY LINES IN 30 MINUTE UTC STEPS"
+# ILG columns kept in the table though they are not shown: the station code
+# and call sign tell entries apart when files are merged, see MERGED_COLUMN_MAP
+ILG_HIDDEN_COLUMNS = ("STN", "CALL SIGN - NETWORK IDENTIFICATION", ILG_GRID_COLUMN)
+
+# ILG columns that are not shown in the list
+ILG_EXCLUDED_COLUMNS = [
+    "24 HOURS TIMES BY LINES IN 30 MINUTE UTC STEPS",
+    "AZI",
+    "REMARKS/COMMENT",
+    "M",
+    "CIRAFZONES - RECEPTION ZONES",
+    "COUNTRY OF TRANSM.",
+    "POSITION: LONGI,LATI",
+    "B", "S", "YY,",
+    "CALL SIGN - NETWORK IDENTIFICATION",
+    "Start", "Stop",
+    "TARGET AREA MATRIX",
+    "STN",
+    "LONGI",
+    "LATI"
+]
+
+class ScheduleFileParser:
+    # Reads a schedule file line by line and yields the parsed rows in chunks of
+    # (data_item, schedule) pairs, so memory use while parsing is bounded by the
+    # chunk size and the first rows can be shown before the whole file is read.
+    # Subclasses know the header and row layout of one file type.
+    file_type = None
+    frequency_column = None
+    time_column = None
+    days_column = None
+    target_column = None
+    language_column = None
+    cacheable = True # Parsed rows may be kept in the parse cache
+    header_attributes = ("column_names",) # Set by parse_header, handed to worker processes
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.column_names = [] # Columns shown in the list
+        self.column_widths = {} # Longest formatted value per column, without padding
+        file_stat = os.stat(filepath)
+        self.total_bytes = file_stat.st_size
+        self.mtime_ns = file_stat.st_mtime_ns
+        self.content_hash = hashlib.sha256() # Of all bytes read, for the parse cache
+        self.bytes_read = 0
+        self.row_count = 0
+        self.bad_schedules = [] # Reasons of the schedules that could not be parsed
+        self.error = None
+        self.complete = False # True once the whole file has been parsed
+        self.from_cache = False # True if the rows came from the parse cache
+        self.activity_index = None # Read from the parse cache with the rows, if it was saved there
+
+    def reopen(self):
+        # A new parser for the same file, to read it again after it changed
+        return type(self)(self.filepath)
+
+    def source_paths(self):
+        return [self.filepath]
+
+    def parse_header(self, line):
+        # Returns True once the header line has been found
+        raise NotImplementedError
+
+    def parse_row(self, line):
+        # Returns the data_item of a line, None for lines without data
+        raise NotImplementedError
+
+    def iter_chunks(self, chunk_size=LOAD_CHUNK_SIZE):
+        with open(self.filepath, "rb") as f:
+            header_found = False
+            chunk = []
+            chunk_started = time.perf_counter()
+            for raw_line in f:
+                self.content_hash.update(raw_line)
+                line = raw_line.decode("utf-8", errors="ignore")
+                if not header_found:
+                    header_found = self.parse_header(line)
+                    if self.error:
+                        print(f"Error: {self.error}")
+                        return
+                    if header_found:
+                        self.column_widths = {col: len(col) for col in self.column_names}
+                    continue
+
+                data_item = self.parse_row(line)
+                if data_item is None:
+                    continue
+                schedule = compile_schedule(data_item.get(self.time_column, ""), data_item.get(self.days_column, ""))
+                if schedule.error:
+                    self.bad_schedules.append(schedule.error)
+                chunk.append((data_item, schedule))
+                if len(chunk) >= chunk_size:
+                    self.row_count += len(chunk)
+                    self.bytes_read = f.tell()
+                    self._measure_chunk(chunk, chunk_started)
+                    yield chunk
+                    chunk = []
+                    chunk_started = time.perf_counter()
+
+            self.bytes_read = self.total_bytes
+            if not header_found:
+                self.error = self.missing_header_error
+                print(f"Error: {self.error}")
+                return
+            self.row_count += len(chunk)
+            self.complete = True
+            self._measure_chunk(chunk, chunk_started)
+            yield chunk
+
+    def _measure_chunk(self, chunk, chunk_started):
+        # Column widths of a parsed chunk, the parse and width time go to TIMINGS
+        widths_started = time.perf_counter()
+        for data_item, schedule in chunk:
+            self._measure(data_item)
+        if TIMINGS.enabled:
+            TIMINGS.add("parse", widths_started - chunk_started)
+            TIMINGS.add("widths", time.perf_counter() - widths_started)
+
+    def _measure(self, data_item):
+        for col_name, value in data_item.items():
+            if col_name in self.column_widths:
+                if col_name == self.frequency_column:
+                    formatted_len = len(f"{value:<.2f}") # Consider 2 decimal places
+                else:
+                    formatted_len = len(str(value))
+                if formatted_len > self.column_widths[col_name]:
+                    self.column_widths[col_name] = formatted_len
+
+    def padded_column_widths(self):
+        # Add a small padding to each column width
+        return {col_name: width + 2 for col_name, width in self.column_widths.items()}
+
+    def parse_all(self):
+        # Parses the whole file at once, returns lists of data_items and schedules
+        data_items, schedules = [], []
+        for chunk in self.iter_chunks():
+            for data_item, schedule in chunk:
+                data_items.append(data_item)
+                schedules.append(schedule)
+        return data_items, schedules
+
+    def read_header(self):
+        # Reads the file up to its header line, returns the offset of the line
+        # after it or None if there is no usable header
+        with open(self.filepath, "rb") as f:
+            for raw_line in iter(f.readline, b""):
+                self.content_hash.update(raw_line)
+                header_found = self.parse_header(raw_line.decode("utf-8", errors="ignore"))
+                if self.error:
+                    print(f"Error: {self.error}")
+                    return None
+                if header_found:
+                    self.column_widths = {col: len(col) for col in self.column_names}
+                    return f.tell()
+        self.error = self.missing_header_error
+        print(f"Error: {self.error}")
+        return None
+
+    def byte_ranges(self, start, chunk_bytes=PARALLEL_CHUNK_BYTES):
+        # (start, end) offsets of about chunk_bytes each from start to the end
+        # of the file, every range ends after a newline
+        ranges = []
+        with open(self.filepath, "rb") as f:
+            while start < self.total_bytes:
+                end = start + chunk_bytes
+                if end < self.total_bytes:
+                    f.seek(end - 1)
+                    f.readline()
+                    end = f.tell()
+                end = min(end, self.total_bytes)
+                ranges.append((start, end))
+                start = end
+        return ranges
+
+    def iter_tables(self, workers, chunk_bytes=PARALLEL_CHUNK_BYTES, block=True):
+        # Parses the file in a pool of worker processes, one byte range per
+        # task, and yields a ScheduleTable per range in file order, to be
+        # added with ScheduleTable.extend(). The rows, values and column widths
+        # come out the same as with iter_chunks(). With block=False None is
+        # yielded while the next range is still being parsed or hashed.
+        data_start = self.read_header()
+        if data_start is None:
+            return
+        header_state = {name: getattr(self, name) for name in self.header_attributes}
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        # The parse cache needs the hash of the whole file. It is computed in a
+        # thread while the workers parse (hashlib releases the GIL), so the
+        # caller is not held up by a read of the whole file before the first rows.
+        hash_stop = threading.Event()
+        def hash_rest():
+            with open(self.filepath, "rb") as f:
+                f.seek(data_start)
+                for block_bytes in iter(lambda: f.read(1 << 20), b""):
+                    if hash_stop.is_set():
+                        return
+                    self.content_hash.update(block_bytes)
+        hash_thread = threading.Thread(target=hash_rest, daemon=True)
+        try:
+            futures = [(executor.submit(_parse_byte_range, type(self), self.filepath, header_state, start, end), end)
+                       for start, end in self.byte_ranges(data_start, chunk_bytes)]
+            hash_thread.start()
+            for future, end in futures:
+                while not block and not future.done():
+                    yield None
+                table, column_widths, bad_schedules, seconds = future.result()
+                for col_name, width in column_widths.items():
+                    if width > self.column_widths.get(col_name, 0):
+                        self.column_widths[col_name] = width
+                self.bad_schedules.extend(bad_schedules)
+                self.row_count += len(table)
+                self.bytes_read = end
+                TIMINGS.add("parse", seconds)
+                yield table
+            while not block and hash_thread.is_alive():
+                yield None
+            hash_thread.join()
+            self.bytes_read = self.total_bytes
+            self.complete = True
+        finally:
+            hash_stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+def parallel_workers(parser, workers=None):
+    # Worker processes to parse the file of parser with, 0 to parse it in
+    # this process. By default large files use one worker per core.
+    if not parser.cacheable: # Merged lists are parsed per file, see MergedScheduleParser
+        return 0
+    if workers is None:
+        if parser.total_bytes < PARALLEL_LOAD_MIN_BYTES:
+            return 0
+        workers = os.cpu_count() or 1
+    return workers if workers > 1 else 0
+
+def _parse_byte_range(parser_class, filepath, header_state, start, end):
+    # Runs in a worker process of ScheduleFileParser.iter_tables(): parses
+    # the lines between two byte offsets of a file into a ScheduleTable
+    started = time.perf_counter()
+    parser = parser_class(filepath)
+    parser.__dict__.update(header_state)
+    parser.column_widths = {col: 0 for col in parser.column_names}
+    table = ScheduleTable(parser.frequency_column)
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    for raw_line in io.BytesIO(data): # Splits at newlines only, like reading the file
+        data_item = parser.parse_row(raw_line.decode("utf-8", errors="ignore"))
+        if data_item is None:
+            continue
+        schedule = compile_schedule(data_item.get(parser.time_column, ""), data_item.get(parser.days_column, ""))
+        if schedule.error:
+            parser.bad_schedules.append(schedule.error)
+        parser._measure(data_item)
+        table.append(data_item, schedule)
+    return table, parser.column_widths, parser.bad_schedules, time.perf_counter() - started
+
+class EibiParser(ScheduleFileParser):
+    file_type = "EIBI"
+    frequency_column = "kHz"
+    time_column = "Time(UTC)"
+    days_column = "Days"
+    target_column = "Target"
+    language_column = "Lng"
+    missing_header_error = "EIBI CSV file is empty."
+
+    def parse_header(self, line):
+        raw_column_names = line.strip().split(';')
+        self.column_names = [col.split(':')[0].strip() for col in raw_column_names if col.strip()]
+        if not self.column_names:
+            self.error = "Could not parse header line in EIBI CSV file."
+        return True
+
+    def parse_row(self, line):
+        stripped_line = line.strip()
+        parts = stripped_line.split(';')
+        if not parts or not parts[0].replace('.', '', 1).isdigit(): # Check if the first part is a number (frequency)
+            return None # Skip lines that don't start with a frequency
+
+        try:
+            data_item = {}
+            for j, col_name in enumerate(self.column_names):
+                if j < len(parts):
+                    data_item[col_name] = parts[j].strip()
+                else:
+                    data_item[col_name] = ""
+            # Convert frequency to float
+            data_item["kHz"] = float(data_item["kHz"])
+            return data_item
+        except (ValueError, KeyError) as e:
+            print(f"Skipping EIBI line due to parsing error: {e} in line: {stripped_line}")
+            return None
+
+class IlgParser(ScheduleFileParser):
+    file_type = "ILG"
+    frequency_column = "FREQkhz"
+    time_column = "TIMES:UTC"
+    days_column = "1=Sun"
+    target_column = "TARGET"
+    language_column = "LANGUAGE"
+    missing_header_error = "Could not find a suitable header line in the ILG file."
+    header_attributes = ("column_names", "file_column_names")
+
+    def parse_header(self, line):
+        stripped_line = line.strip()
+        if "FREQkhz" in stripped_line and not stripped_line.startswith(('##', '###')):
+            # This is likely the header line
+            raw_column_names = stripped_line.split(';')
+            self.file_column_names = [col.replace('##', '').replace('###', '').strip() for col in raw_column_names]
+            # Remove empty strings from column names
+            self.file_column_names = [col for col in self.file_column_names if col]
+            self.column_names = [col for col in self.file_column_names if col not in ILG_EXCLUDED_COLUMNS]
+            return True
+        return False
+
+    def parse_row(self, line):
+        parts = line.strip().split(';')
+        if not (len(parts) > 0 and parts[0].replace('.', '', 1).isdigit()): # Check if the first part is a number (frequency)
+            return None
+        try:
+            data_item = {}
+            for j, col_name in enumerate(self.file_column_names):
+                if j < len(parts):
+                    data_item[col_name] = parts[j].strip()
+                else:
+                    data_item[col_name] = ""
+
+            for col in ILG_EXCLUDED_COLUMNS:
+                if col in data_item and col not in ILG_HIDDEN_COLUMNS:
+                    del data_item[col]
+
+            # Convert frequency to float
+            data_item["FREQkhz"] = float(data_item["FREQkhz"])
+            return data_item
+        except (ValueError, KeyError):
+            # Skip lines where frequency cannot be parsed or a key is missing
+            return None
+
+_MISSING = object()
+
+class RowView:
+    # Lightweight, dict-like read access to one row of a ScheduleTable
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def get(self, col_name, default=None):
+        return self.table.value(self.row, col_name, default)
+
+    def __getitem__(self, col_name):
+        value = self.table.value(self.row, col_name, _MISSING)
+        if value is _MISSING:
+            raise KeyError(col_name)
+        return value
+
+    def __contains__(self, col_name):
+        return col_name in self.table.column_names
+
+    def __eq__(self, other):
+        return isinstance(other, RowView) and other.table is self.table and other.row == self.row
+
+    def __hash__(self):
+        return hash((id(self.table), self.row))
+
+    def keys(self):
+        return list(self.table.column_names)
+
+    def values(self):
+        return [self.table.value(self.row, col_name) for col_name in self.table.column_names]
+
+    def items(self):
+        return [(col_name, self.table.value(self.row, col_name)) for col_name in self.table.column_names]
+
+class ScheduleTable:
+    # Columnar store for the rows of a schedule file. The frequency is a float
+    # array, every other column is dictionary encoded (an array of codes into a
+    # list of distinct, interned strings) and the compiled schedules are kept as
+    # integer columns. Rows are read through RowView objects.
+    def __init__(self, frequency_column):
+        self.frequency_column = frequency_column
+        self.column_names = [] # In file order, including the frequency column
+        self.khz = array.array('d')
+        self.codes = {} # Column name -> array of codes into self.values[column name]
+        self.values = {} # Column name -> distinct values of the column
+        self._value_codes = {} # Column name -> value -> code
+        self.day_mask = array.array('B')
+        self.start_minute = array.array('i')
+        self.end_minute = array.array('i')
+        self.schedule_errors = {} # Row -> reason its schedule could not be parsed
+
+    def __len__(self):
+        return len(self.khz)
+
+    def __getitem__(self, row):
+        return RowView(self, row)
+
+    def __iter__(self):
+        return (RowView(self, row) for row in range(len(self.khz)))
+
+    def _add_column(self, col_name):
+        self.column_names.append(col_name)
+        if col_name != self.frequency_column:
+            self.values[col_name] = [""]
+            self._value_codes[col_name] = {"": 0}
+            # Rows added before the column existed have an empty value
+            self.codes[col_name] = array.array('I', bytes(4 * len(self.khz)))
+
+    def append(self, data_item, schedule):
+        for col_name in data_item:
+            if col_name not in self._value_codes and col_name != self.frequency_column:
+                self._add_column(col_name)
+        if self.frequency_column not in self.column_names:
+            self._add_column(self.frequency_column)
+
+        self.khz.append(data_item[self.frequency_column])
+        for col_name, codes in self.codes.items():
+            value = data_item.get(col_name, "")
+            value_codes = self._value_codes[col_name]
+            code = value_codes.get(value)
+            if code is None:
+                code = len(self.values[col_name])
+                value_codes[value] = code
+                self.values[col_name].append(sys.intern(value))
+            codes.append(code)
+
+        row = len(self.khz) - 1
+        try:
+            self.start_minute.append(schedule.start_minute)
+            self.end_minute.append(schedule.end_minute)
+        except OverflowError:
+            self.start_minute.append(0)
+            self.end_minute.append(0)
+            schedule = Schedule(0, 0, 0, "time range out of range")
+        self.day_mask.append(schedule.day_mask)
+        if schedule.error:
+            self.schedule_errors[row] = schedule.error
+
+    def extend(self, other):
+        # Appends all rows of another table of the same file type, e.g. one
+        # parsed by a worker process. The codes of other are translated into
+        # codes of this table one distinct value at a time.
+        first_row = len(self.khz)
+        for col_name in other.column_names:
+            if col_name not in self.column_names:
+                self._add_column(col_name)
+        for col_name, codes in self.codes.items():
+            other_codes = other.codes.get(col_name)
+            if other_codes is None:
+                codes.frombytes(bytes(codes.itemsize * len(other)))
+                continue
+            values = self.values[col_name]
+            value_codes = self._value_codes[col_name]
+            translated = array.array('I')
+            for value in other.values[col_name]:
+                code = value_codes.get(value)
+                if code is None:
+                    code = len(values)
+                    value_codes[value] = code
+                    values.append(sys.intern(value))
+                translated.append(code)
+            codes.extend(map(translated.__getitem__, other_codes))
+        self.khz.extend(other.khz)
+        self.day_mask.extend(other.day_mask)
+        self.start_minute.extend(other.start_minute)
+        self.end_minute.extend(other.end_minute)
+        for row, error in other.schedule_errors.items():
+            self.schedule_errors[first_row + row] = error
+
+    def value(self, row, col_name, default=None):
+        if col_name == self.frequency_column:
+            return self.khz[row]
+        codes = self.codes.get(col_name)
+        if codes is None:
+            return default
+        return self.values[col_name][codes[row]]
+
+    def row_dict(self, row):
+        # All values of a row as a plain dict, faster than going through RowView
+        data_item = {col_name: self.values[col_name][codes[row]] for col_name, codes in self.codes.items()}
+        data_item[self.frequency_column] = self.khz[row]
+        return data_item
+
+    def schedule(self, row):
+        return Schedule(self.day_mask[row], self.start_minute[row], self.end_minute[row], self.schedule_errors.get(row))
+
+    def schedules(self):
+        return (self.schedule(row) for row in range(len(self.khz)))
+
+    def schedule_times(self):
+        # (day mask, start minute, end minute) per row, without the errors
+        return zip(self.day_mask, self.start_minute, self.end_minute)
+
+    def rows_containing(self, col_name, term):
+        # Rows whose value in col_name contains term (case-insensitive). Each
+        # distinct value is tested once, the rows are then picked by code.
+        codes = self.codes.get(col_name)
+        if codes is None:
+            return []
+        term = term.lower()
+        matching_codes = bytearray(term in value.lower() for value in self.values[col_name])
+        return list(itertools.compress(range(len(codes)), map(matching_codes.__getitem__, codes)))
+
+class RenderCache:
+    # Display lines and lowercased search keys of the rows of a ScheduleTable
+    # for one set of column widths. Every distinct value of a column is padded
+    # once when a line first needs it, lines are joined from those on first
+    # use and the search keys are made step by step or on the first search. A new
+    # cache is made whenever the table or the column widths change, which is
+    # cheap as nothing is padded up front.
+    def __init__(self, table, column_names, column_widths, search_display_line=True):
+        self.table = table
+        self.column_names = list(column_names)
+        self.column_widths = dict(column_widths)
+        self.table_column_count = len(table.column_names) # Columns the table had when the values were padded
+        # EIBI searches the display line, ILG each value on its own
+        self.search_display_line = search_display_line
+        self.lines = {} # Row -> display line
+        self.keys = [] # Search keys of rows 0 .. len(keys) - 1, see build_keys()
+        self._padded_columns = []
+        for col_name in self.column_names:
+            width = self.column_widths.get(col_name, 15) # Default to 15 if width not found
+            if col_name == table.frequency_column:
+                self._padded_columns.append((None, width, None, width))
+            elif col_name in table.codes:
+                padded_values = [None] * len(table.values[col_name])
+                self._padded_columns.append((table.codes[col_name], padded_values, table.values[col_name], width))
+            else:
+                self._padded_columns.append((None, " " * width, None, width))
+
+    def is_valid_for(self, table, column_names, column_widths):
+        return (table is self.table and len(table.column_names) == self.table_column_count
+                and column_names == self.column_names and column_widths == self.column_widths)
+
+    def line(self, row):
+        display_line = self.lines.get(row)
+        if display_line is None:
+            display_line = self.lines[row] = self._format_line(row)
+        return display_line
+
+    def _format_line(self, row):
+        formatted_parts = []
+        for codes, padded, values, width in self._padded_columns:
+            if codes is not None:
+                code = codes[row]
+                if code >= len(padded): # Values added to the table since the cache was made
+                    padded.extend([None] * (len(values) - len(padded)))
+                padded_value = padded[code]
+                if padded_value is None:
+                    padded_value = padded[code] = f"{values[code]:<{width}}"
+                formatted_parts.append(padded_value)
+            elif isinstance(padded, int):
+                formatted_parts.append(f"{self.table.khz[row]:<{padded}.2f}") # Format frequency specifically
+            else:
+                formatted_parts.append(padded)
+        return "".join(formatted_parts)
+
+    def search_key(self, row):
+        if row < len(self.keys):
+            return self.keys[row]
+        if self.search_display_line:
+            # Lines only shown once are kept, not those of every row searched
+            display_line = self.lines.get(row)
+            return (display_line if display_line is not None else self._format_line(row)).lower()
+        # Newlines keep a search term from matching across two values, only
+        # shown columns are searched (not the ILG time grid)
+        return "\n".join(str(self.table.value(row, col_name, "")).lower() for col_name in self.column_names)
+
+    def build_keys(self, count):
+        # Makes the search keys of the next count rows, so the GUI can make
+        # them in small steps before the first search. Returns True once the
+        # keys of all rows are made.
+        start = len(self.keys)
+        self.keys.extend(self.search_key(row) for row in range(start, min(start + count, len(self.table))))
+        return len(self.keys) >= len(self.table)
+
+    def search_keys(self):
+        # Also makes the keys of rows appended by ScheduleEngine.apply_changes
+        self.build_keys(len(self.table))
+        return self.keys
+
+    def search(self, term, row_bits, within=None):
+        # Rows of the bitset row_bits whose search key contains term. Pass the
+        # result of a shorter term in within to only narrow that result down.
+        keys = self.search_keys()
+        if within is not None:
+            return [row for row in within if term in keys[row]]
+        return [row for row in bitset_rows(row_bits) if term in keys[row]]
+
+def table_cache_path(filepath):
+    name = hashlib.sha1(os.path.abspath(filepath).encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, name + ".cache")
+
+def file_content_hash(filepath):
+    content_hash = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            content_hash.update(block)
+    return content_hash.hexdigest()
+
+def _table_arrays(table, activity_index=None):
+    # (name, array) of every column of a ScheduleTable, then of the activity
+    # index if one is given, in cache file order
+    yield "khz", table.khz
+    yield "day_mask", table.day_mask
+    yield "start_minute", table.start_minute
+    yield "end_minute", table.end_minute
+    for col_name, codes in table.codes.items():
+        yield "codes:" + col_name, codes
+    if activity_index is not None:
+        yield "activity:starts", array.array('i', activity_index.starts)
+        yield "activity:segments", activity_index.packed_segments()
+
+def save_table_cache(parser, table, activity_index=None):
+    # Cache file layout: CACHE_MAGIC, the length of a JSON header (8 bytes,
+    # little endian), the header, then the raw bytes of every array at an
+    # 8-byte aligned offset, so the file can be memory-mapped on reload.
+    header = {
+        "version": CACHE_VERSION,
+        "byteorder": sys.byteorder,
+        "path": os.path.abspath(parser.filepath),
+        "size": parser.total_bytes,
+        "mtime_ns": parser.mtime_ns,
+        "sha256": parser.content_hash.hexdigest(),
+        "file_type": parser.file_type,
+        "frequency_column": table.frequency_column,
+        "table_columns": table.column_names,
+        "column_names": parser.column_names,
+        "column_widths": parser.column_widths,
+        "values": table.values,
+        "schedule_errors": {str(row): error for row, error in table.schedule_errors.items()},
+        "arrays": [],
+    }
+    arrays = list(_table_arrays(table, activity_index))
+    offset = 0
+    for name, values in arrays:
+        header["arrays"].append({"name": name, "typecode": values.typecode, "itemsize": values.itemsize, "offset": offset, "count": len(values)})
+        offset += (len(values) * values.itemsize + 7) & ~7
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = (len(CACHE_MAGIC) + 8 + len(header_bytes) + 7) & ~7
+
+    cache_path = table_cache_path(parser.filepath)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        temp_path = cache_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(CACHE_MAGIC + len(header_bytes).to_bytes(8, "little") + header_bytes)
+            for entry, (name, values) in zip(header["arrays"], arrays):
+                f.seek(data_start + entry["offset"])
+                f.write(values.tobytes())
+            f.truncate(data_start + offset)
+        os.replace(temp_path, cache_path) # Never leave a half written cache behind
+    except OSError as e:
+        print(f"Could not write parse cache {cache_path}: {e}")
+
+def load_table_cache(parser):
+    # Returns the cached ScheduleTable of parser.filepath and fills in the
+    # parser's columns and parser.activity_index (None if the cache has no
+    # index), or None if there is no cache or the file has changed
+    cache_path = table_cache_path(parser.filepath)
+    try:
+        with open(cache_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mapped[:len(CACHE_MAGIC)] != CACHE_MAGIC:
+                return None
+            header_start = len(CACHE_MAGIC) + 8
+            header_length = int.from_bytes(mapped[len(CACHE_MAGIC):header_start], "little")
+            mapped_header = mapped[header_start:header_start + header_length]
+            header = json.loads(mapped_header)
+            if (header.get("version") != CACHE_VERSION or header["byteorder"] != sys.byteorder
+                    or header["file_type"] != parser.file_type or header["size"] != parser.total_bytes):
+                return None
+            # A changed mtime alone does not invalidate the cache, changed content does
+            mtime_changed = header["mtime_ns"] != parser.mtime_ns
+            if mtime_changed and header["sha256"] != file_content_hash(parser.filepath):
+                return None
+
+            table = ScheduleTable(header["frequency_column"])
+            table.column_names = header["table_columns"]
+            table.values = {col_name: [sys.intern(value) for value in values] for col_name, values in header["values"].items()}
+            table._value_codes = {col_name: {value: code for code, value in enumerate(values)} for col_name, values in table.values.items()}
+            table.schedule_errors = {int(row): error for row, error in header["schedule_errors"].items()}
+            data_start = (header_start + header_length + 7) & ~7
+            activity_arrays = {}
+            for entry in header["arrays"]:
+                values = array.array(entry["typecode"])
+                if values.itemsize != entry["itemsize"]:
+                    return None
+                start = data_start + entry["offset"]
+                values.frombytes(mapped[start:start + entry["count"] * entry["itemsize"]])
+                name = entry["name"]
+                if name.startswith("codes:"):
+                    table.codes[name[len("codes:"):]] = values
+                elif name.startswith("activity:"):
+                    activity_arrays[name[len("activity:"):]] = values
+                else:
+                    setattr(table, name, values)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"Ignoring unreadable parse cache {cache_path}: {e}")
+        return None
+    if mtime_changed:
+        # The content is unchanged (a touch, copy or download again), keep
+        # the new mtime so later loads skip the hash again
+        _update_cache_mtime(cache_path, header_start, mapped_header, header["mtime_ns"], parser.mtime_ns)
+
+    parser.column_names = header["column_names"]
+    parser.column_widths = header["column_widths"]
+    parser.activity_index = None
+    if activity_arrays:
+        parser.activity_index = ActivityIndex([])
+        parser.activity_index.load_segments(len(table), activity_arrays["starts"], activity_arrays["segments"])
+    parser.bad_schedules = list(table.schedule_errors.values())
+    parser.row_count = len(table)
+    parser.bytes_read = parser.total_bytes
+    parser.complete = True
+    parser.from_cache = True
+    return table
+
+def _update_cache_mtime(cache_path, header_start, header_bytes, old_mtime_ns, new_mtime_ns):
+    # Overwrites the mtime in the JSON header of a cache file in place. The
+    # header stays as long as before, nanosecond mtimes have 19 digits from
+    # 2001 to 2286; otherwise the cache is left as it is, it stays valid
+    # through the content hash.
+    old_field = json.dumps({"mtime_ns": old_mtime_ns})[1:-1].encode("utf-8")
+    new_field = json.dumps({"mtime_ns": new_mtime_ns})[1:-1].encode("utf-8")
+    offset = header_bytes.find(old_field)
+    if len(new_field) != len(old_field) or offset < 0 or header_bytes.find(old_field, offset + 1) >= 0:
+        return
+    try:
+        with open(cache_path, "r+b") as f:
+            f.seek(header_start + offset)
+            f.write(new_field)
+    except OSError as e:
+        print(f"Could not update parse cache {cache_path}: {e}")
+
+# Columns of a merged list and the column of each file type they are taken
+# from, all other columns are dropped when files are merged. The ILG station
+# code is the country code of the broadcaster like the EIBI ITU column.
+MERGED_COLUMNS = ["kHz", "Time(UTC)", "Days", "ITU", "Station", "Lng", "Target", "Remarks", "Source"]
+MERGED_COLUMN_MAP = {
+    "EIBI": {"kHz": "kHz", "Time(UTC)": "Time(UTC)", "Days": "Days", "ITU": "ITU", "Station": "Station", "Lng": "Lng", "Target": "Target", "Remarks": "Remarks"},
+    "ILG": {"FREQkhz": "kHz", "TIMES:UTC": "Time(UTC)", "1=Sun": "Days", "STN": "ITU", "CALL SIGN - NETWORK IDENTIFICATION": "Station",
+            "LANGUAGE": "Lng", "TARGET": "Target"},
+}
+
+class MergedScheduleParser(ScheduleFileParser):
+    # Reads several schedule files (EIBI A/B, ILG, local lists in either
+    # format) and yields their rows as one list in frequency order, with the
+    # columns of MERGED_COLUMNS. Each file is read into its own table, from
+    # the parse cache where possible, and its rows are sorted by frequency
+    # once. The sorted files are then k-way merged, so no list is sorted
+    # again and the cost grows with the number of rows. Entries listed by
+    # more than one file (same frequency, station and schedule) are kept
+    # once, their Source column names every file that listed them.
+    file_type = "MERGED"
+    frequency_column = "kHz"
+    time_column = "Time(UTC)"
+    days_column = "Days"
+    target_column = "Target"
+    language_column = "Lng"
+    cacheable = False
+
+    def __init__(self, filepaths, workers=None):
+        self.filepaths = list(filepaths)
+        self.workers = workers # For parallel_workers(), per file
+        self.filepath = ", ".join(os.path.basename(filepath) for filepath in self.filepaths)
+        self.column_names = list(MERGED_COLUMNS)
+        self.column_widths = {col_name: len(col_name) for col_name in MERGED_COLUMNS}
+        self.total_bytes = sum(os.stat(filepath).st_size for filepath in self.filepaths)
+        self.bytes_read = 0
+        self.row_count = 0
+        self.duplicate_count = 0 # Entries dropped because another file listed them too
+        self.bad_schedules = []
+        self.error = None
+        self.complete = False
+        self.from_cache = False
+        self.activity_index = None
+        self.sources = [] # (source tag, file type, ScheduleTable) of every file read
+
+    def reopen(self):
+        return MergedScheduleParser(self.filepaths, self.workers)
+
+    def source_paths(self):
+        return list(self.filepaths)
+
+    def read_sources(self, chunk_size):
+        # Reads every file into its own table. Yields None after each parsed
+        # chunk, so the GUI stays responsive while large files are read.
+        bytes_done = 0
+        for filepath in self.filepaths:
+            parser = detect_parser_class(filepath)(filepath)
+            table = load_table_cache(parser)
+            if table is None:
+                table = ScheduleTable(parser.frequency_column)
+                workers = parallel_workers(parser, self.workers)
+                if workers:
+                    for part in parser.iter_tables(workers, block=False):
+                        if part is not None:
+                            table.extend(part)
+                        self.bytes_read = bytes_done + parser.bytes_read
+                        yield None
+                else:
+                    for chunk in parser.iter_chunks(chunk_size):
+                        for data_item, schedule in chunk:
+                            table.append(data_item, schedule)
+                        self.bytes_read = bytes_done + parser.bytes_read
+                        yield None
+                if not parser.complete:
+                    self.error = f"{os.path.basename(filepath)}: {parser.error}"
+                    return
+                save_table_cache(parser, table)
+            bytes_done += parser.total_bytes
+            self.bytes_read = bytes_done
+            self.sources.append((os.path.basename(filepath), parser.file_type, table))
+
+    def iter_chunks(self, chunk_size=LOAD_CHUNK_SIZE):
+        for _ in self.read_sources(chunk_size):
+            yield []
+        if self.error:
+            print(f"Error: {self.error}")
+            return
+
+        # One stream of (kHz, source, row) per file in frequency order, the
+        # files are usually sorted already which makes the sort close to linear
+        streams = []
+        columns = [] # Per source: (merged column, codes, values) of the columns taken over
+        for source, (tag, file_type, table) in enumerate(self.sources):
+            rows = sorted(range(len(table)), key=table.khz.__getitem__)
+            streams.append(zip(map(table.khz.__getitem__, rows), itertools.repeat(source), rows))
+            column_map = MERGED_COLUMN_MAP.get(file_type, {})
+            columns.append([(column_map[col_name], table.codes[col_name], table.values[col_name])
+                            for col_name in table.codes if col_name in column_map])
+            # The column widths follow from the distinct values of every file
+            # instead of being measured row by row
+            for merged_col_name, codes, values in columns[-1]:
+                self.column_widths[merged_col_name] = max(self.column_widths[merged_col_name], max(map(len, values)))
+            if len(table):
+                self.column_widths["kHz"] = max(self.column_widths["kHz"], len(f"{max(table.khz):.2f}"))
+
+        chunk = []
+        chunk_started = time.perf_counter()
+        group_khz = None
+        group = {} # Duplicate key -> [[data_item, schedule, source tags, sources]] of the entries on group_khz
+        for khz, source, row in heapq.merge(*streams):
+            if khz != group_khz:
+                self._flush_group(group, chunk)
+                group = {}
+                group_khz = khz
+                if len(chunk) >= chunk_size:
+                    self.row_count += len(chunk)
+                    self._measure_chunk(chunk, chunk_started)
+                    yield chunk
+                    chunk = []
+                    chunk_started = time.perf_counter()
+
+            tag, file_type, table = self.sources[source]
+            data_item = dict.fromkeys(MERGED_COLUMNS, "")
+            for merged_col_name, codes, values in columns[source]:
+                data_item[merged_col_name] = values[codes[row]]
+            data_item["kHz"] = khz
+            schedule = table.schedule(row)
+            # Entries are told apart by station, entries without one by
+            # country, language and target
+            station = data_item["Station"].lower()
+            key = (khz, station or (data_item["ITU"].lower(), data_item["Lng"].lower(), data_item["Target"].lower()),
+                   schedule.day_mask, schedule.start_minute, schedule.end_minute,
+                   schedule.error and (data_item["Time(UTC)"], data_item["Days"]))
+            # A duplicate is dropped only if it comes from another file, equal
+            # rows of one file are all kept
+            entries = group.setdefault(key, [])
+            for entry in entries:
+                if source not in entry[3]:
+                    self.duplicate_count += 1
+                    entry[3].add(source)
+                    if tag not in entry[2]:
+                        entry[2].append(tag)
+                    break
+            else:
+                entries.append([data_item, schedule, [tag], {source}])
+
+        self._flush_group(group, chunk)
+        self.row_count += len(chunk)
+        self.complete = True
+        self._measure_chunk(chunk, chunk_started)
+        if self.duplicate_count:
+            print(f"Merged {len(self.sources)} files into {self.row_count} entries, {self.duplicate_count} duplicates dropped.")
+        yield chunk
+
+    def _measure(self, data_item):
+        # Widths are set from the source tables in iter_chunks
+        pass
+
+    def _flush_group(self, group, chunk):
+        for entries in group.values():
+            for data_item, schedule, tags, sources in entries:
+                data_item["Source"] = "+".join(tags)
+                if len(data_item["Source"]) > self.column_widths["Source"]:
+                    self.column_widths["Source"] = len(data_item["Source"])
+                # Counted on the merged entries, a row found in several files is reported once
+                if schedule.error:
+                    self.bad_schedules.append(schedule.error)
+                chunk.append((data_item, schedule))
+
+def percentile(sorted_values, percent):
+    # Nearest-rank percentile of an ascending list
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+class TimeoutTransport(xmlrpc.client.Transport):
+    # xmlrpc transport with a socket timeout, so a hung FLRIG cannot block forever
+    def __init__(self, timeout=FLRIG_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        connection.timeout = self.timeout
+        return connection
+
+class FlrigClient:
+    # One long-lived XML-RPC link to a FLRIG instance. The transport keeps its
+    # HTTP/1.1 connection open, so polls and tune commands reuse the same socket.
+    def __init__(self, host, port, timeout=FLRIG_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.transport = TimeoutTransport(timeout)
+        self.server = xmlrpc.client.ServerProxy(f"http://{host}:{port}", transport=self.transport)
+        self.multicall_supported = True
+
+    def get_frequency(self):
+        with TIMINGS.measure("rpc.get_vfo"):
+            return self.server.rig.get_vfo()
+
+    def set_frequency(self, frequency_hz):
+        # Sets the frequency and returns the confirming rig.get_vfo, batched into
+        # one system.multicall round trip when FLRIG supports it
+        with TIMINGS.measure("rpc.set_frequency"):
+            return self._set_frequency(frequency_hz)
+
+    def _set_frequency(self, frequency_hz):
+        if self.multicall_supported:
+            multicall = xmlrpc.client.MultiCall(self.server)
+            multicall.main.set_frequency(float(frequency_hz))
+            multicall.rig.get_vfo()
+            try:
+                return multicall()[1]
+            except xmlrpc.client.Fault as fault:
+                if "multicall" not in fault.faultString:
+                    raise
+                print("FLRIG does not support system.multicall, sending single requests.")
+                self.multicall_supported = False
+        self.server.main.set_frequency(float(frequency_hz))
+        return self.server.rig.get_vfo()
+
+    def close(self):
+        self.transport.close()
+
+class PollScheduler:
+    # Pause between two polls of one rig. While the frequency changes, and for
+    # FLRIG_POLL_HOLD seconds after, the rig is polled every FLRIG_POLL_FAST
+    # seconds. Then every poll grows the pause by FLRIG_POLL_BACKOFF, up to
+    # FLRIG_POLL_STABLE_MAX on a steady frequency or FLRIG_POLL_UNREACHABLE_MAX
+    # while FLRIG does not answer. A tune command starts over at the fast rate.
+    def __init__(self, fast=FLRIG_POLL_FAST, hold=FLRIG_POLL_HOLD, backoff=FLRIG_POLL_BACKOFF,
+                 stable_max=FLRIG_POLL_STABLE_MAX, unreachable_max=FLRIG_POLL_UNREACHABLE_MAX, clock=time.monotonic):
+        self.fast = fast
+        self.hold = hold
+        self.backoff = backoff
+        self.stable_max = stable_max
+        self.unreachable_max = unreachable_max
+        self.clock = clock
+        self.interval = fast
+        self.frequency_hz = None # Result of the last poll
+        self.changed_at = clock()
+
+    def reset(self):
+        self.interval = self.fast
+        self.changed_at = self.clock()
+
+    def next_interval(self, frequency_hz):
+        # Seconds to wait after a poll that returned frequency_hz (None if
+        # FLRIG could not be reached)
+        now = self.clock()
+        if frequency_hz is not None and frequency_hz != self.frequency_hz:
+            self.changed_at = now
+        self.frequency_hz = frequency_hz
+        if frequency_hz is not None and now - self.changed_at < self.hold:
+            self.interval = self.fast
+        else:
+            limit = self.stable_max if frequency_hz is not None else self.unreachable_max
+            self.interval = min(self.interval * self.backoff, limit)
+        return self.interval
+
+class FlrigPoller(threading.Thread):
+    # Background worker that owns the FLRIG link. The Tk main thread never talks
+    # to FLRIG directly: it queues tune commands here and reads frequency
+    # updates from self.updates. The poll rate adapts to the tuning activity,
+    # see PollScheduler.
+    def __init__(self, host, port, timeout=FLRIG_TIMEOUT, updates=None, rig=0):
+        super().__init__(daemon=True)
+        self.schedule = PollScheduler()
+        self.timeout = timeout
+        self.rig = rig # Number of this rig in the updates, see FlrigRigGroup
+        # (rig, frequency in Hz or None if FLRIG is unreachable), may be shared by several pollers
+        self.updates = queue.Queue() if updates is None else updates
+        self._pending_tune = None # Only the latest requested frequency is sent
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._endpoint = (host, port)
+        self._client = None
+        self._reachable = True
+        # Cost of the requests of this rig, kept whether TIMINGS is on or not
+        self.rpc_stat = TimingStat()
+        self.failures = 0
+        self._poll_times = collections.deque() # time.monotonic() of the polls in the last FLRIG_POLL_RATE_WINDOW
+
+    def set_endpoint(self, host, port):
+        with self._lock:
+            self._endpoint = (host, port)
+
+    def tune(self, frequency_hz):
+        # Rapid clicks overwrite each other, the worker only sends the newest target
+        with self._lock:
+            self._pending_tune = frequency_hz
+        self._wakeup.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    def _get_client(self):
+        # Reuse the open connection until the host or port changes
+        with self._lock:
+            host, port = self._endpoint
+        if self._client is None or (self._client.host, self._client.port) != (host, port):
+            if self._client is not None:
+                self._client.close()
+            self._client = FlrigClient(host, port, self.timeout)
+        return self._client
+
+    def endpoint_text(self):
+        with self._lock:
+            return "%s:%s" % self._endpoint
+
+    def _report_error(self, action, error):
+        # Only report when the link goes down, not on every poll
+        if self._reachable:
+            if isinstance(error, ConnectionRefusedError):
+                print(f"Connection to FLRIG at {self.endpoint_text()} refused. Is FLRIG running?")
+            else:
+                print(f"An error occurred while {action} on {self.endpoint_text()}: {error}")
+        self._reachable = False
+
+    def _set_frequency(self, frequency_hz):
+        try:
+            frequency_raw = self._get_client().set_frequency(frequency_hz)
+        except Exception as e:
+            self._report_error("setting frequency", e)
+            return None
+        print(f"Frequency set to: {frequency_hz} Hz")
+        return self._parse_frequency(frequency_raw)
+
+    def _get_frequency(self):
+        try:
+            frequency_raw = self._get_client().get_frequency()
+        except Exception as e:
+            self._report_error("getting frequency", e)
+            return None
+        return self._parse_frequency(frequency_raw)
+
+    def _parse_frequency(self, frequency_raw):
+        if not self._reachable:
+            print(f"Connection to FLRIG at {self.endpoint_text()} established.")
+            self._reachable = True
+        try:
+            return float(frequency_raw)
+        except ValueError:
+            print(f"Could not convert FLRIG frequency '{frequency_raw}' to a number.")
+            return None
+
+    def run(self):
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            with self._lock:
+                frequency_hz, self._pending_tune = self._pending_tune, None
+            started = time.perf_counter()
+            if frequency_hz is not None:
+                # The confirming rig.get_vfo comes back with the tune command
+                self.schedule.reset()
+                reported_hz = self._set_frequency(frequency_hz)
+            else:
+                reported_hz = self._get_frequency()
+            self._record_poll(time.perf_counter() - started, reported_hz is None)
+            self.updates.put((self.rig, reported_hz))
+            self._wakeup.wait(self.schedule.next_interval(reported_hz))
+        if self._client is not None:
+            self._client.close()
+
+    def _record_poll(self, seconds, failed):
+        now = time.monotonic()
+        with self._lock:
+            self.rpc_stat.add(seconds)
+            if failed:
+                self.failures += 1
+            self._poll_times.append(now)
+            while self._poll_times[0] < now - FLRIG_POLL_RATE_WINDOW:
+                self._poll_times.popleft()
+
+    def poll_stats(self):
+        # Current pause between polls, recent poll rate and the cost of the
+        # FLRIG requests of this rig
+        endpoint = self.endpoint_text()
+        now = time.monotonic()
+        with self._lock:
+            poll_times = [poll_time for poll_time in self._poll_times if poll_time >= now - FLRIG_POLL_RATE_WINDOW]
+            count = self.rpc_stat.count
+            return {
+                "rig": self.rig,
+                "endpoint": endpoint,
+                "interval_s": round(self.schedule.interval, 3),
+                "polls_per_second": round((len(poll_times) - 1) / (now - poll_times[0]), 2) if len(poll_times) > 1 else 0.0,
+                "requests": count,
+                "failures": self.failures,
+                "rpc_mean_ms": round(self.rpc_stat.total * 1000 / count, 3) if count else 0.0,
+                "rpc_p90_ms": round(float(self.rpc_stat.percentile_ms(90)), 3) if count else 0.0,
+                "rpc_total_s": round(self.rpc_stat.total, 3),
+            }
+
+def parse_rig_endpoints(text, default_port="12345"):
+    # "host:port, host:port" -> [(host, port)], a missing port means default_port
+    endpoints = []
+    for part in text.replace(";", ",").split(","):
+        part = part.strip()
+        if part:
+            host, _, port = part.rpartition(":") if ":" in part else (part, "", default_port)
+            endpoints.append((host.strip(), port.strip() or default_port))
+    return endpoints
+
+class FlrigRigGroup:
+    # Tracks several FLRIG instances. Every rig has its own poller thread with
+    # its own timeout, so a slow or dead rig never delays the others. All
+    # pollers report to the shared self.updates queue as (rig, frequency).
+    def __init__(self, timeout=FLRIG_TIMEOUT):
+        self.timeout = timeout
+        self.updates = queue.Queue()
+        self.pollers = []
+
+    def __len__(self):
+        return len(self.pollers)
+
+    def set_endpoints(self, endpoints):
+        # Rigs keep their number as long as their position in the list stays
+        for rig, (host, port) in enumerate(endpoints):
+            if rig < len(self.pollers):
+                self.pollers[rig].set_endpoint(host, port)
+            else:
+                poller = FlrigPoller(host, port, self.timeout, self.updates, rig)
+                poller.start()
+                self.pollers.append(poller)
+        while len(self.pollers) > len(endpoints):
+            self.pollers.pop().stop()
+
+    def tune(self, rig, frequency_hz):
+        if rig < len(self.pollers):
+            self.pollers[rig].tune(frequency_hz)
+
+    def poll_stats(self):
+        return [poller.poll_stats() for poller in self.pollers]
+
+    def stop(self):
+        for poller in self.pollers:
+            poller.stop()
+        self.pollers = []
+
+def parse_skip_list(text):
+    # "6000-6100, 7055" -> [(6000.0, 6100.0), (7055.0, 7055.0)] in kHz
+    skip_ranges = []
+    for part in text.replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        low, _, high = part.partition("-")
+        try:
+            low = float(low)
+            high = float(high) if high.strip() else low
+        except ValueError:
+            print(f"Ignoring skip list entry '{part}', expected e.g. '7055' or '6000-6100'.")
+            continue
+        skip_ranges.append((min(low, high), max(low, high)))
+    return skip_ranges
+
+def build_scan_plan(frequencies_khz, skip_ranges=()):
+    # Sorted unique frequencies (to 10 Hz) outside all skip ranges
+    plan = set()
+    for khz in frequencies_khz:
+        khz = round(khz, 2)
+        if not any(low - 0.005 <= khz <= high + 0.005 for low, high in skip_ranges):
+            plan.add(khz)
+    return sorted(plan)
+
+class BandScanner(threading.Thread):
+    # Steps a rig through a tune plan, dwell seconds per frequency. Steps are
+    # due at fixed points start + n * dwell, so slow commands do not add up to
+    # drift; steps missed entirely (a rig slower than the dwell time) are
+    # skipped and counted as overruns. The scanner keeps its own persistent
+    # FLRIG connection and sends each tune command together with the
+    # confirming rig.get_vfo in one round trip.
+    def __init__(self, host, port, plan, dwell, timeout=FLRIG_TIMEOUT, updates=None, rig=0):
+        super().__init__(daemon=True)
+        self.host = host
+        self.port = port
+        self.dwell = dwell
+        self.timeout = timeout
+        self.rig = rig
+        # (rig, confirmed frequency in Hz or None), like FlrigPoller.updates
+        self.updates = queue.Queue() if updates is None else updates
+        self.plan = list(plan)
+        self.next_step = 0 # Index into self.plan of the next frequency
+        self.current_khz = None
+        self.step_count = 0
+        self.overruns = 0
+        self.lateness = [] # Seconds each command was sent after its due time
+        self.intervals = [] # Seconds between two commands actually sent
+        self.round_trips = [] # Seconds per tune command including the confirmation
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def set_plan(self, plan):
+        # A new plan (the active view changed) continues above the current frequency
+        with self._lock:
+            self.plan = list(plan)
+            if self.current_khz is None:
+                self.next_step = 0
+            else:
+                self.next_step = bisect.bisect_right(self.plan, self.current_khz)
+
+    def stop(self):
+        self._stopped.set()
+
+    def position(self):
+        # (step in plan, plan length, current kHz) for display
+        with self._lock:
+            return self.next_step, len(self.plan), self.current_khz
+
+    def run(self):
+        client = FlrigClient(self.host, self.port, self.timeout)
+        due = time.monotonic()
+        last_sent = None
+        reachable = True
+        try:
+            while not self._stopped.is_set():
+                with self._lock:
+                    if self.plan:
+                        if self.next_step >= len(self.plan):
+                            self.next_step = 0 # Wrap around to the lowest frequency
+                        khz = self.plan[self.next_step]
+                        self.next_step += 1
+                    else:
+                        khz = None
+                if khz is None:
+                    # Nothing to scan right now, wait for a plan
+                    if self._stopped.wait(self.dwell):
+                        break
+                    due, last_sent = time.monotonic(), None
+                    continue
+
+                if self._stopped.wait(max(due - time.monotonic(), 0)):
+                    break
+                sent = time.monotonic()
+                try:
+                    frequency_raw = client.set_frequency(int(round(khz * 1000)))
+                    frequency_hz = float(frequency_raw)
+                    if not reachable:
+                        print(f"Scanner reconnected to FLRIG at {self.host}:{self.port}.")
+                        reachable = True
+                except Exception as e:
+                    if reachable:
+                        print(f"Scanner could not tune FLRIG at {self.host}:{self.port}: {e}")
+                        reachable = False
+                    frequency_hz = None
+                finished = time.monotonic()
+                with self._lock:
+                    self.current_khz = khz
+                    self.step_count += 1
+                    self.lateness.append(sent - due)
+                    self.round_trips.append(finished - sent)
+                    if last_sent is not None:
+                        self.intervals.append(sent - last_sent)
+                last_sent = sent
+                self.updates.put((self.rig, frequency_hz))
+
+                due += self.dwell
+                if finished > due:
+                    # The command took longer than a whole step, keep to the grid
+                    missed = int((finished - due) // self.dwell) + 1
+                    due += missed * self.dwell
+                    self.overruns += missed
+        finally:
+            client.close()
+
+    def timing_stats(self):
+        # Step timing in milliseconds, lateness is the jitter against the due times
+        with self._lock:
+            lateness = sorted(self.lateness)
+            intervals = list(self.intervals)
+            round_trips = sorted(self.round_trips)
+        mean_interval = sum(intervals) / len(intervals) if intervals else 0.0
+        return {
+            "steps": self.step_count,
+            "overruns": self.overruns,
+            "dwell_ms": round(self.dwell * 1000, 3),
+            "interval_mean_ms": round(mean_interval * 1000, 3),
+            "interval_stdev_ms": round(statistics.pstdev(intervals) * 1000, 3) if intervals else 0.0,
+            "lateness_p50_ms": round(percentile(lateness, 50) * 1000, 3),
+            "lateness_p99_ms": round(percentile(lateness, 99) * 1000, 3),
+            "lateness_max_ms": round(lateness[-1] * 1000, 3) if lateness else 0.0,
+            "round_trip_p50_ms": round(percentile(round_trips, 50) * 1000, 3),
+            "round_trip_p99_ms": round(percentile(round_trips, 99) * 1000, 3),
+        }
+
+class FrequencyIndex:
+    # Sorted kHz values of the displayed rows (self.khz) with a parallel array of
+    # their row offsets in the listbox (self.rows). All lookups are bisections.
+    def __init__(self, frequencies):
+        self.rows = sorted(range(len(frequencies)), key=frequencies.__getitem__)
+        self.khz = [frequencies[row] for row in self.rows]
+        # Smallest row offset among all entries from a sorted position onwards,
+        # used to find the insertion point in display order, made on first use
+        self.min_row_from = None
+
+    def __len__(self):
+        return len(self.khz)
+
+    def subset(self, rows):
+        # FrequencyIndex of the entries rows[0], rows[1], ... of this index
+        # with their positions in rows as offsets. The entries are picked
+        # from the sorted order, nothing is sorted again.
+        position = [-1] * len(self.khz)
+        for offset, row in enumerate(rows):
+            position[row] = offset
+        positions = list(map(position.__getitem__, self.rows))
+        kept = list(map((-1).__lt__, positions))
+        subset = FrequencyIndex([])
+        subset.rows = list(itertools.compress(positions, kept))
+        subset.khz = list(itertools.compress(self.khz, kept))
+        return subset
+
+    def window(self, khz, span):
+        # Row offsets (in display order) of all entries within khz +/- span
+        start = bisect.bisect_left(self.khz, khz - span)
+        end = bisect.bisect_right(self.khz, khz + span)
+        return sorted(self.rows[start:end])
+
+    def exact_matches(self, khz, tolerance=0.01):
+        start = bisect.bisect_left(self.khz, khz - tolerance)
+        end = bisect.bisect_right(self.khz, khz + tolerance)
+        return sorted(self.rows[i] for i in range(start, end) if abs(self.khz[i] - khz) < tolerance)
+
+    def insertion_point(self, khz):
+        # Row offset in front of the first displayed entry above khz
+        i = bisect.bisect_right(self.khz, khz)
+        if i == len(self.khz):
+            return len(self.khz)
+        if self.min_row_from is None:
+            self.min_row_from = list(itertools.accumulate(reversed(self.rows), min))[::-1]
+        return self.min_row_from[i]
+
+class FrequencyTimeline:
+    # The broadcasts of the entries on one frequency over the week, for "on
+    # now / next up / just ended". Schedules are split into pieces of at most
+    # one day (see schedule_week_intervals) and kept in arrays sorted by start
+    # and by end, so each query is a bisection plus a walk over the few
+    # pieces at one boundary. A piece that carries on another piece of the
+    # same row (past midnight or the end of the week) is chained to it
+    # instead of counting as a start or an end of its own.
+    def __init__(self, rows, schedules):
+        self.pieces = sorted((start, end, row) for row, schedule in zip(rows, schedules) for start, end in schedule_week_intervals(schedule))
+        self.starts = [start for start, end, row in self.pieces]
+        self._end_of = {(row, start): end for start, end, row in self.pieces} # Piece starting at a minute -> its end
+        self._start_of = {(row, end % MINUTES_PER_WEEK): start for start, end, row in self.pieces} # Piece ending at a minute -> its start
+        # Starts and ends of whole broadcasts
+        first_pieces = [(start, end, row) for start, end, row in self.pieces if (row, start) not in self._start_of]
+        self.first_starts = [start for start, end, row in first_pieces]
+        self.first_pieces = first_pieces
+        last_pieces = sorted(((end, start, row) for start, end, row in self.pieces if (row, end % MINUTES_PER_WEEK) not in self._end_of))
+        self.last_ends = [end for end, start, row in last_pieces]
+        self.last_pieces = last_pieces
+
+    def broadcast(self, row, start, end):
+        # (since, until) of the broadcast a piece belongs to, in minutes of the
+        # week that may lie before 0 or past its end; (None, None) for a
+        # broadcast that never stops
+        since, until = start, end
+        for _ in range(7):
+            previous_start = self._start_of.get((row, since % MINUTES_PER_WEEK))
+            if previous_start is None:
+                break
+            since -= (since - previous_start) % MINUTES_PER_WEEK
+        else:
+            return None, None
+        for _ in range(7):
+            next_end = self._end_of.get((row, until % MINUTES_PER_WEEK))
+            if next_end is None:
+                break
+            until += next_end - until % MINUTES_PER_WEEK
+        return since, until
+
+    def on_air(self, week_minute):
+        # [(row, since, until)] of the broadcasts on air at week_minute. No
+        # piece is longer than a day, so only pieces starting in the day
+        # before can contain week_minute.
+        first = bisect.bisect_right(self.starts, week_minute - MINUTES_PER_DAY)
+        last = bisect.bisect_right(self.starts, week_minute)
+        return [(row,) + self.broadcast(row, start, end) for start, end, row in self.pieces[first:last] if end > week_minute]
+
+    def next_up(self, week_minute):
+        # (minutes until, [(row, since, until)]) of the broadcasts starting
+        # next after week_minute, looking into the next week if needed. Rows
+        # on air now are left out. None if nothing else starts.
+        on_air_rows = {row for row, since, until in self.on_air(week_minute)}
+        first = bisect.bisect_right(self.first_starts, week_minute)
+        next_start = None
+        entries = []
+        for i in range(len(self.first_pieces)):
+            start, end, row = self.first_pieces[(first + i) % len(self.first_pieces)]
+            if row in on_air_rows:
+                continue
+            if next_start is None:
+                next_start = start
+            elif start != next_start:
+                break
+            entries.append((row,) + self.broadcast(row, start, end))
+        if next_start is None:
+            return None
+        return (next_start - week_minute) % MINUTES_PER_WEEK or MINUTES_PER_WEEK, entries
+
+    def just_ended(self, week_minute):
+        # (minutes ago, [(row, since, until)]) of the broadcasts that ended
+        # last at or before week_minute, looking into the previous week if
+        # needed. Rows on air now are left out. None if nothing ended.
+        on_air_rows = {row for row, since, until in self.on_air(week_minute)}
+        last = bisect.bisect_right(self.last_ends, week_minute) - 1
+        last_end = None
+        entries = []
+        for i in range(len(self.last_pieces)):
+            end, start, row = self.last_pieces[(last - i) % len(self.last_pieces)]
+            if row in on_air_rows:
+                continue
+            if last_end is None:
+                last_end = end
+            elif end != last_end:
+                break
+            entries.append((row,) + self.broadcast(row, start, end))
+        if last_end is None:
+            return None
+        return (week_minute - last_end) % MINUTES_PER_WEEK, entries
+
+# Columns that name an entry in short, see ScheduleEngine.entry_title
+TITLE_COLUMNS = {
+    "EIBI": ("Station", "Lng", "Target"),
+    "ILG": ("LANGUAGE", "TARGET"),
+    "MERGED": ("Station", "Lng", "Target"),
+}
+
+# Columns that identify an entry together with its frequency when a changed
+# file is compared with the loaded version, see ScheduleEngine.apply_changes
+ROW_KEY_COLUMNS = {
+    "EIBI": ("Time(UTC)", "Days", "Station", "Lng"),
+    "ILG": ("TIMES:UTC", "1=Sun", "STN", "CALL SIGN - NETWORK IDENTIFICATION", "LANGUAGE", "TARGET", ILG_GRID_COLUMN),
+    "MERGED": ("Time(UTC)", "Days", "Station", "Lng"),
+}
+
+def file_signature(filepaths):
+    # (mtime, size) of every file, None for files that cannot be read
+    signature = []
+    for filepath in filepaths:
+        try:
+            file_stat = os.stat(filepath)
+            signature.append((file_stat.st_mtime_ns, file_stat.st_size))
+        except OSError:
+            signature.append(None)
+    return signature
+
+def _row_values(table, col_names):
+    # Every row of a table as a tuple of its frequency and its values in col_names
+    return list(zip(table.khz, *(map(table.values[col_name].__getitem__, table.codes[col_name]) for col_name in col_names)))
+
+def detect_parser_class(filepath):
+    # ILG files have a header line with a FREQkhz column, everything else is read as EIBI
+    with open(filepath, "rb") as f:
+        for line_number, raw_line in enumerate(f):
+            if line_number >= 100:
+                break
+            line = raw_line.decode("utf-8", errors="ignore").strip()
+            if "FREQkhz" in line and not line.startswith(('##', '###')):
+                return IlgParser
+    return EibiParser
+
+def current_week_time():
+    # (weekday, minute of day) in UTC
+    now_utc = datetime.now(timezone.utc)
+    return now_utc.weekday(), now_utc.hour * 60 + now_utc.minute
+
+class ScheduleEngine:
+    # The loaded schedule file with everything derived from it: the table, the
+    # activity index, the column layout and the filter and search caches.
+    # The GUI and the command line both query the file through this class.
+    def __init__(self):
+        self.filepath = None
+        self.file_type = None # "EIBI", "ILG" or "MERGED"
+        self.target_column = None
+        self.language_column = None
+        self.table = ScheduleTable(None) # Columnar store of all parsed rows, never filtered
+        self.activity_index = ActivityIndex([]) # Rows on air per segment of the week
+        self.column_names = [] # Columns shown, in display order
+        self.column_widths = {} # Padded display width per column
+        self.target_filter_cache = {} # Target filter term -> bitset of matching rows
+        self.language_filter_cache = {} # Language filter term -> bitset of matching rows
+        self._render_cache = None # Formatted lines and search keys, see render_cache()
+        self._frequency_index = None # Sorted frequencies of all rows, see frequency_index()
+        self.last_search = None # (term, filter bits, render cache, rows) of the last search
+        self.parser = None # Parser of the loaded file, reopened by reload_steps()
+        self.file_signature = None # Of the loaded files, see files_changed()
+        self.deleted = 0 # Bitset of the rows removed from the file after it was loaded
+        self.row_position = None # Place of every row in the file once a reload appended rows, else None
+        self.workers = None # Worker processes to parse files with, see parallel_workers()
+        self._timelines = {} # kHz -> FrequencyTimeline, see timeline()
+        self._timelines_for = None # (table, row count, deleted rows) the timelines were built from
+        self._slot_codes = None # (table, codes, slot masks, mask -> code), see slot_codes()
+
+    def start(self, parser):
+        # Forget the previous file and get ready for the rows of parser. Returns
+        # True if an unchanged file was read from the parse cache, then the
+        # table is complete and only finish() is left to do.
+        self.filepath = parser.filepath
+        self.file_type = parser.file_type
+        self.target_column = parser.target_column
+        self.language_column = parser.language_column
+        self.table = ScheduleTable(parser.frequency_column)
+        self.activity_index = ActivityIndex([])
+        self.column_names = []
+        self.column_widths = {}
+        self.target_filter_cache = {}
+        self.language_filter_cache = {}
+        self._frequency_index = None
+        self.last_search = None
+        self.parser = parser
+        self.file_signature = file_signature(parser.source_paths())
+        self.deleted = 0
+        self.row_position = None
+        cached_table = load_table_cache(parser) if parser.cacheable else None
+        if cached_table is not None:
+            self.table = cached_table
+            return True
+        return False
+
+    def update_layout(self, parser):
+        # Column widths grow while the file is read
+        self.column_names = parser.column_names
+        self.column_widths = parser.padded_column_widths()
+
+    def finish(self, parser):
+        # Called once all rows (or all rows read before a cancel) are in the table
+        if parser.from_cache and parser.activity_index is not None:
+            self.activity_index = parser.activity_index
+        else:
+            self.activity_index = ActivityIndex(self.table.schedule_times())
+        if parser.complete and parser.cacheable and not parser.from_cache:
+            save_table_cache(parser, self.table, self.activity_index)
+        # Unparseable schedules are reported once per load, those entries never count as active
+        if parser.bad_schedules:
+            print(f"{len(parser.bad_schedules)} entries have an unparseable schedule and are never active, e.g. {parser.bad_schedules[0]}.")
+        self.update_layout(parser)
+
+    def load(self, filepath, parser_class=None):
+        # Load a whole file at once, returns the parser
+        if parser_class is None:
+            parser_class = detect_parser_class(filepath)
+        return self.load_parser(parser_class(filepath))
+
+    def load_files(self, filepaths, parser_class=None):
+        # Load one file, or merge several into one list, returns the parser
+        if len(filepaths) == 1:
+            return self.load(filepaths[0], parser_class)
+        return self.load_parser(MergedScheduleParser(filepaths, self.workers))
+
+    def load_parser(self, parser):
+        if not self.start(parser):
+            for _ in self.parse_steps(parser, block=True):
+                pass
+        self.finish(parser)
+        return parser
+
+    def parse_steps(self, parser, table=None, block=False):
+        # Parses the file of parser into table (self.table by default) and
+        # yields True after every chunk. Large files are parsed by worker
+        # processes, see parallel_workers(); with block=False False is
+        # yielded while waiting for them.
+        if table is None:
+            table = self.table
+        workers = parallel_workers(parser, self.workers)
+        if workers:
+            for part in parser.iter_tables(workers, block=block):
+                if part is not None:
+                    table.extend(part)
+                yield part is not None
+        else:
+            for chunk in parser.iter_chunks(LOAD_CHUNK_SIZE):
+                for data_item, schedule in chunk:
+                    table.append(data_item, schedule)
+                yield True
+
+    def target_filter_bits(self, target_filter):
+        # Bitset of the rows whose target contains target_filter, cached per term
+        return self._column_filter_bits(self.target_filter_cache, self.target_column, target_filter)
+
+    def language_filter_bits(self, language_filter):
+        return self._column_filter_bits(self.language_filter_cache, self.language_column, language_filter)
+
+    def _column_filter_bits(self, cache, col_name, term):
+        bits = cache.get(term)
+        if bits is None:
+            rows = self.table.rows_containing(col_name, term)
+            bits = rows_bitset(rows, len(self.table))
+            cache[term] = bits
+        return bits
+
+    def filtered_bits(self, active_time=None, target_filter=""):
+        # Compose the active filter (a (weekday, minute of day) pair, None for
+        # all rows) and the target filter as bitsets over self.table
+        bits = ((1 << len(self.table)) - 1) & ~self.deleted
+        if active_time is not None:
+            bits &= self.activity_index.active_at(*active_time)
+        if target_filter:
+            bits &= self.target_filter_bits(target_filter.lower())
+        return bits
+
+    def search_rows(self, bits, filter_value):
+        # Rows of bits whose search key contains filter_value. While the search
+        # term only grows and the other filters stay the same, the previous
+        # result is narrowed down.
+        if not filter_value:
+            self.last_search = None
+            return self.in_file_order(bitset_rows(bits))
+        render_cache = self.render_cache()
+        within = None
+        if self.last_search is not None:
+            last_term, last_bits, last_cache, last_rows = self.last_search
+            if last_term in filter_value and last_bits == bits and last_cache is render_cache:
+                within = last_rows
+        rows = render_cache.search(filter_value, bits, within)
+        if within is None:
+            rows = self.in_file_order(rows)
+        self.last_search = (filter_value, bits, render_cache, rows)
+        return rows
+
+    def render_cache(self):
+        # Display lines and search keys for the current table and column widths
+        if self._render_cache is None or not self._render_cache.is_valid_for(self.table, self.column_names, self.column_widths):
+            self._render_cache = RenderCache(self.table, self.column_names, self.column_widths, search_display_line=(self.file_type != "ILG"))
+        return self._render_cache
+
+    def header_line(self):
+        return "".join(f"{col_name:<{self.column_widths.get(col_name, len(col_name) + 2)}}" for col_name in self.column_names)
+
+    def query(self, active_time=None, target_filter="", search="", khz=None, span=None):
+        # Rows matching all given conditions in file order. With khz only the
+        # rows on that frequency are returned, or within khz +/- span if given.
+        with TIMINGS.measure("filter"):
+            return self._query(active_time, target_filter, search, khz, span)
+
+    def _query(self, active_time, target_filter, search, khz, span):
+        bits = self.filtered_bits(active_time, target_filter)
+        if khz is None:
+            return self.search_rows(bits, search.lower())
+        # The frequency index covers the whole table, its offsets are rows.
+        # The few rows near khz are tested one by one instead of walking the
+        # bitsets of the whole table.
+        if span is None:
+            rows = self.frequency_index().exact_matches(khz)
+        else:
+            rows = self.frequency_index().window(khz, span)
+        if bits != (1 << len(self.table)) - 1:
+            data = bits.to_bytes((len(self.table) + 7) // 8, "little")
+            rows = [row for row in rows if data[row >> 3] >> (row & 7) & 1]
+        if search:
+            keys = self.render_cache().search_keys()
+            search = search.lower()
+            rows = [row for row in rows if search in keys[row]]
+        return self.in_file_order(rows)
+
+    def in_file_order(self, rows):
+        # Rows appended by a reload sit at the end of the table, they are
+        # sorted back to their place in the file
+        if self.row_position is None:
+            return rows
+        return sorted(rows, key=self.row_position.__getitem__)
+
+    def files_changed(self):
+        # True if a loaded file was written since it was read. A file that is
+        # missing (e.g. while it is being replaced) does not count yet.
+        if self.parser is None:
+            return False
+        signature = file_signature(self.parser.source_paths())
+        return None not in signature and signature != self.file_signature
+
+    def reload_steps(self):
+        # Reads the loaded files again and applies the differences with
+        # apply_changes(). Yields after every parsed chunk; returns the
+        # (inserted, deleted, updated) counts, or None if the file could not
+        # be read, then the loaded rows stay as they are.
+        parser = self.parser.reopen()
+        signature = file_signature(parser.source_paths())
+        table = load_table_cache(parser) if parser.cacheable else None
+        if table is None:
+            table = ScheduleTable(parser.frequency_column)
+            yield from self.parse_steps(parser, table)
+            if not parser.complete:
+                self.file_signature = signature # Wait for the next change
+                return None
+            if parser.cacheable:
+                save_table_cache(parser, table)
+        self.parser = parser
+        self.file_signature = signature
+        with TIMINGS.measure("reload"):
+            return self.apply_changes(parser, table)
+
+    def apply_changes(self, parser, table):
+        # Brings the loaded table in line with table, a newly read version of
+        # the same file. Entries are matched by frequency and ROW_KEY_COLUMNS.
+        # Unchanged rows keep their row number, so the activity index, render
+        # cache, search keys and displayed rows stay valid; removed rows are
+        # masked with self.deleted, new and changed rows are appended and
+        # self.row_position keeps the file order. Returns the (inserted,
+        # deleted, updated) counts.
+        old_table = self.table
+        live_rows = bitset_rows(((1 << len(old_table)) - 1) & ~self.deleted)
+        if table.frequency_column != old_table.frequency_column or table.column_names != old_table.column_names:
+            return self._replace_table(parser, table, len(live_rows))
+
+        value_columns = [col_name for col_name in table.column_names if col_name != table.frequency_column]
+        key_indexes = [0] + [1 + value_columns.index(col_name) for col_name in ROW_KEY_COLUMNS.get(self.file_type, ()) if col_name in value_columns]
+        row_key = operator.itemgetter(*key_indexes)
+        old_values = _row_values(old_table, value_columns)
+        new_values = _row_values(table, value_columns)
+
+        # Entries with the same key are told apart by their order in the file
+        old_rows_by_key = {}
+        occurrences = collections.Counter()
+        for row in live_rows:
+            key = row_key(old_values[row])
+            occurrences[key] += 1
+            old_rows_by_key[key, occurrences[key]] = row
+        occurrences.clear()
+        position = array.array('I', bytes(4 * len(old_table)))
+        inserted, updated = [], []
+        for new_row, values in enumerate(new_values):
+            key = row_key(values)
+            occurrences[key] += 1
+            old_row = old_rows_by_key.pop((key, occurrences[key]), None)
+            if old_row is None:
+                inserted.append(new_row)
+            elif old_values[old_row] != values:
+                updated.append((old_row, new_row))
+            else:
+                position[old_row] = new_row
+        deleted = list(old_rows_by_key.values())
+
+        removed = deleted + [old_row for old_row, new_row in updated]
+        added = sorted(inserted + [new_row for old_row, new_row in updated])
+        # Once most of the table is removed rows, a fresh table is cheaper
+        tombstones = bin(self.deleted).count("1") + len(removed)
+        if 2 * tombstones > len(old_table) + len(added):
+            return self._replace_table(parser, table, len(live_rows))
+
+        self.deleted |= rows_bitset(removed, len(old_table))
+        first_new_row = len(old_table)
+        for new_row in added:
+            old_table.append(table.row_dict(new_row), table.schedule(new_row))
+            position.append(new_row)
+        self.activity_index.add_rows(first_new_row, (old_table.schedule(row) for row in range(first_new_row, len(old_table))))
+        if self.deleted or position != array.array('I', range(len(position))):
+            self.row_position = position
+        else:
+            self.row_position = None
+        self.target_filter_cache = {}
+        self.language_filter_cache = {}
+        self.last_search = None
+        self._frequency_index = None
+        # Columns only grow here, so the render cache stays valid unless a
+        # new value is wider than the loaded ones
+        widths = parser.padded_column_widths()
+        for col_name, width in self.column_widths.items():
+            widths[col_name] = max(widths.get(col_name, 0), width)
+        self.column_names = parser.column_names
+        self.column_widths = widths
+        return len(inserted), len(deleted), len(updated)
+
+    def _replace_table(self, parser, table, old_row_count):
+        # The changed file replaces the loaded rows as a whole
+        self.table = table
+        self.deleted = 0
+        self.row_position = None
+        if parser.from_cache and parser.activity_index is not None:
+            self.activity_index = parser.activity_index
+        else:
+            self.activity_index = ActivityIndex(table.schedule_times())
+        self.target_filter_cache = {}
+        self.language_filter_cache = {}
+        self.last_search = None
+        self._frequency_index = None
+        self.update_layout(parser)
+        return len(table), old_row_count, 0
+
+    def timeline(self, khz, tolerance=0.01):
+        # FrequencyTimeline of the entries on khz, built on first use and kept
+        # until the table changes
+        if self._timelines_for is None or self._timelines_for[0] is not self.table or self._timelines_for[1:] != (len(self.table), self.deleted):
+            self._timelines = {}
+            self._timelines_for = (self.table, len(self.table), self.deleted)
+        key = round(khz, 2)
+        timeline = self._timelines.get(key)
+        if timeline is None:
+            rows = [row for row in self.frequency_index().exact_matches(khz, tolerance) if not self.deleted >> row & 1]
+            timeline = self._timelines[key] = FrequencyTimeline(rows, (self.table.schedule(row) for row in rows))
+        return timeline
+
+    def slot_codes(self):
+        # (codes, slot masks): the slot mask of row r is slot_masks[codes[r]].
+        # ILG entries use their time grid, others their time range in half
+        # hour slots. Few masks are distinct, so they are dictionary encoded
+        # like the columns of the table. Built on first use, extended when
+        # rows were added.
+        if self._slot_codes is not None and self._slot_codes[0] is self.table:
+            table, codes, slot_masks, mask_codes = self._slot_codes
+        else:
+            codes, slot_masks, mask_codes = array.array('I'), [0], {0: 0}
+            self._slot_codes = (self.table, codes, slot_masks, mask_codes)
+        first_row = len(codes)
+        if first_row == len(self.table):
+            return codes, slot_masks
+        grid_codes = self.table.codes.get(ILG_GRID_COLUMN)
+        grid_masks = [parse_slot_grid(value) for value in self.table.values[ILG_GRID_COLUMN]] if grid_codes is not None else []
+        range_masks = {} # (start, end) -> slot mask
+        for row in range(first_row, len(self.table)):
+            # Entries with an unparseable schedule are never active, whatever their grid says
+            if row in self.table.schedule_errors:
+                slot_mask = 0
+            else:
+                slot_mask = grid_masks[grid_codes[row]] if grid_codes is not None else None
+                if slot_mask is None:
+                    time_range = (self.table.start_minute[row], self.table.end_minute[row])
+                    slot_mask = range_masks.get(time_range)
+                    if slot_mask is None:
+                        slot_mask = range_masks[time_range] = schedule_slot_mask(*time_range)
+            code = mask_codes.get(slot_mask)
+            if code is None:
+                code = mask_codes[slot_mask] = len(slot_masks)
+                slot_masks.append(slot_mask)
+            codes.append(code)
+        return codes, slot_masks
+
+    def occupancy(self, bin_khz=OCCUPANCY_BIN_KHZ, target_filter="", language_filter="", weekday=None):
+        # Band occupancy heatmap: [(lowest kHz of a frequency bin, entries on
+        # air in each half hour slot)] for every bin with matching entries on
+        # air at some time, in frequency order. weekday (0 = Monday) only
+        # counts the entries scheduled on that day, None those of every day.
+        # Entries are counted per (bin, slot mask) pair, only the pairs are
+        # spread over the slots.
+        started = time.perf_counter()
+        bits = self.filtered_bits(None, target_filter)
+        if language_filter:
+            bits &= self.language_filter_bits(language_filter.lower())
+        if load_numpy() is not None:
+            heatmap = self._occupancy_numpy(bits, bin_khz, weekday)
+        else:
+            heatmap = self._occupancy_python(bits, bin_khz, weekday)
+        TIMINGS.add("occupancy", time.perf_counter() - started)
+        return heatmap
+
+    def _occupancy_numpy(self, bits, bin_khz, weekday):
+        row_count = len(self.table)
+        codes, slot_masks = self.slot_codes()
+        selected = numpy.unpackbits(numpy.frombuffer(bits.to_bytes((row_count + 7) // 8, "little"), dtype=numpy.uint8), count=row_count, bitorder="little").view(bool)
+        if weekday is not None:
+            selected &= (numpy.frombuffer(self.table.day_mask, dtype=numpy.uint8) >> weekday & 1).astype(bool)
+        bins = numpy.floor(numpy.frombuffer(self.table.khz, dtype=numpy.float64)[selected] / bin_khz).astype(numpy.int64)
+        if not len(bins):
+            return []
+        first_bin = int(bins.min())
+        bin_count = int(bins.max()) - first_bin + 1
+        # Entries per (bin, mask code) in one pass, then times the slot bits of every mask
+        pairs = (bins - first_bin) * len(slot_masks) + numpy.frombuffer(codes, dtype=numpy.uint32)[selected]
+        pair_counts = numpy.bincount(pairs, minlength=bin_count * len(slot_masks)).reshape(bin_count, len(slot_masks))
+        slot_bits = numpy.array(slot_masks, dtype=numpy.uint64)[:, None] >> numpy.arange(SLOTS_PER_DAY, dtype=numpy.uint64) & numpy.uint64(1)
+        counts = pair_counts @ slot_bits.astype(numpy.int64)
+        return [(int(first_bin + b) * bin_khz, counts[b].tolist()) for b in numpy.flatnonzero(counts.any(axis=1))]
+
+    def _occupancy_python(self, bits, bin_khz, weekday):
+        rows = bitset_rows(bits)
+        if weekday is not None:
+            day_mask = self.table.day_mask
+            rows = [row for row in rows if day_mask[row] >> weekday & 1]
+        khz = self.table.khz
+        codes, slot_masks = self.slot_codes()
+        pair_counts = collections.Counter((math.floor(khz[row] / bin_khz), codes[row]) for row in rows)
+        counts = {} # Bin -> entries on air per slot
+        for (frequency_bin, code), count in pair_counts.items():
+            slot_mask = slot_masks[code]
+            if not slot_mask:
+                continue
+            bin_counts = counts.get(frequency_bin)
+            if bin_counts is None:
+                bin_counts = counts[frequency_bin] = [0] * SLOTS_PER_DAY
+            while slot_mask:
+                slot = (slot_mask & -slot_mask).bit_length() - 1
+                bin_counts[slot] += count
+                slot_mask &= slot_mask - 1
+        return [(frequency_bin * bin_khz, counts[frequency_bin]) for frequency_bin in sorted(counts)]
+
+    def entry_dict(self, row):
+        # Values of the shown columns of a row, as written by query --json and
+        # the server. Columns the table only keeps for internal use, like the
+        # ILG time grid, are left out.
+        data_item = self.table.row_dict(row)
+        if len(data_item) > len(self.column_names):
+            shown_columns = set(self.column_names)
+            data_item = {col_name: value for col_name, value in data_item.items() if col_name in shown_columns}
+        return data_item
+
+    def entry_title(self, row):
+        # Short name of an entry, e.g. "Radio Romania E Eu"
+        values = (self.table.value(row, col_name, "") for col_name in TITLE_COLUMNS.get(self.file_type, ()))
+        return " ".join(value for value in values if value) or f"{self.table.khz[row]:.2f}"
+
+    def frequency_index(self):
+        # FrequencyIndex over all rows of the table, rebuilt when rows were added
+        if self._frequency_index is None or len(self._frequency_index) != len(self.table):
+            self._frequency_index = FrequencyIndex(self.table.khz)
+        return self._frequency_index
+
+    def frequency_index_of(self, rows):
+        # FrequencyIndex of the given rows with their positions in rows as
+        # offsets, e.g. of the rows shown in the list. Most of the table is
+        # picked from frequency_index() in its sorted order, a few rows are
+        # cheaper to sort.
+        if 2 * len(rows) > len(self.table):
+            return self.frequency_index().subset(rows)
+        return FrequencyIndex([self.table.khz[row] for row in rows])
+
+SERVER_PORT = 8073 # Default port of the HTTP/JSON server
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+class ScheduleServer:
+    # HTTP/JSON front end to one or more loaded schedule files. All clients
+    # share the same engines, the requests are answered one at a time from
+    # the asyncio event loop, so the engines need no locking.
+    #
+    #   GET /files                 the loaded files
+    #   GET /query?freq=6070       entries on 6070 kHz
+    #   GET /query?freq=6070&span=5&at=Sa+1800&target=eu&search=english&limit=20
+    #   GET /query?freq=6070&active=1    only entries on air now
+    #   GET /timings               timing statistics (serve --timings)
+    def __init__(self, engines):
+        self.engines = engines
+        self.request_count = 0
+
+    def files(self):
+        return {"files": [{"path": engine.filepath, "type": engine.file_type, "rows": len(engine.table)} for engine in self.engines]}
+
+    def query(self, params):
+        # Returns (status, JSON document) for the query string parameters
+        def number(name):
+            if name not in params:
+                return None
+            try:
+                value = float(params[name])
+            except ValueError:
+                value = math.nan
+            if not math.isfinite(value): # inf or nan would fail further on, not as a bad request
+                raise ValueError(f"'{name}' must be a number")
+            return value
+
+        def whole_number(name):
+            if name not in params:
+                return None
+            try:
+                return int(params[name])
+            except ValueError:
+                raise ValueError(f"'{name}' must be a whole number")
+
+        khz, span, limit = number("freq"), number("span"), whole_number("limit")
+        if span is not None and khz is None:
+            raise ValueError("'span' needs 'freq'")
+        at_time = current_week_time()
+        active_time = None
+        if "at" in params:
+            parsed = parse_week_time(params["at"])
+            if parsed is None:
+                raise ValueError("'at' must look like 'Sa 1800' or '1800'")
+            at_time = (at_time[0] if parsed[0] is None else parsed[0], parsed[1])
+            active_time = at_time
+        elif params.get("active", "0") not in ("", "0", "false"):
+            active_time = at_time
+
+        entries = []
+        for engine in self.engines:
+            rows = engine.query(active_time, params.get("target", ""), params.get("search", ""), khz, span)
+            active_bits = engine.activity_index.active_at(*at_time)
+            active_data = active_bits.to_bytes((len(engine.table) + 7) // 8, "little")
+            filename = os.path.basename(engine.filepath)
+            for row in rows:
+                entry = engine.entry_dict(row)
+                entry["file"] = filename
+                entry["active"] = bool(active_data[row >> 3] >> (row & 7) & 1)
+                entries.append(entry)
+        if len(self.engines) > 1:
+            entries.sort(key=lambda entry: entry.get(EibiParser.frequency_column, entry.get(IlgParser.frequency_column)))
+        if limit is not None:
+            entries = entries[:max(limit, 0)]
+        return {"weekday": at_time[0], "minute": at_time[1], "count": len(entries), "entries": entries}
+
+    def respond(self, method, target):
+        # Returns (status, JSON document) for one request
+        if method != "GET":
+            return 405, {"error": "only GET is supported"}
+        url = urllib.parse.urlsplit(target)
+        params = {name: values[-1] for name, values in urllib.parse.parse_qs(url.query, keep_blank_values=True).items()}
+        if url.path in ("/", "/files"):
+            return 200, self.files()
+        if url.path == "/timings":
+            return 200, {"enabled": TIMINGS.enabled, "timings": TIMINGS.summary()}
+        if url.path == "/query":
+            try:
+                return 200, self.query(params)
+            except ValueError as e:
+                return 400, {"error": str(e)}
+        return 404, {"error": f"unknown path {url.path}"}
+
+    async def handle_client(self, reader, writer):
+        # One connection, kept open for further requests unless asked otherwise
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    header_line = await reader.readline()
+                    if header_line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header_line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip().lower()
+                # Request bodies are not used. One with a length is skipped so
+                # the next request starts in the right place, after any other
+                # (chunked) the connection is closed.
+                body_length = headers.get("content-length", "0")
+                body_skipped = "transfer-encoding" not in headers and body_length.isdigit()
+                if body_skipped:
+                    remaining = int(body_length)
+                    while remaining:
+                        data = await reader.read(min(remaining, 1 << 16))
+                        if not data:
+                            break
+                        remaining -= len(data)
+                parts = request_line.decode("latin-1").split()
+                if len(parts) == 3:
+                    method, target, version = parts
+                    status, document = self.respond(method, target)
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection") != "close" and body_skipped
+                else:
+                    status, document = 400, {"error": "malformed request line"}
+                    keep_alive = False
+                self.request_count += 1
+                body = json.dumps(document, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"Serving {sum(len(engine.table) for engine in self.engines)} entries on http://{host}:{port}/")
+        async with server:
+            await server.serve_forever()
+
+def run_serve(args):
+    engines = []
+    # With --merge all files are served as one merged list
+    for filepaths in [args.file] if args.merge else [[filepath] for filepath in args.file]:
+        engine = ScheduleEngine()
+        engine.workers = args.workers
+        try:
+            parser = engine.load_files(filepaths, {"eibi": EibiParser, "ilg": IlgParser}.get(args.type))
+        except OSError as e:
+            print(f"Could not open {e.filename}: {e.strerror}", file=sys.stderr)
+            return 1
+        if parser.error:
+            return 1
+        # The search keys are made before the first request
+        engine.render_cache().search_keys()
+        engine.frequency_index()
+        engines.append(engine)
+    try:
+        asyncio.run(ScheduleServer(engines).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+async def _load_test_client(host, port, paths, request_budget, latencies, errors):
+    # Sends requests over one keep-alive connection until the budget is used up
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while request_budget[0] > 0:
+            request_budget[0] -= 1
+            path = paths[request_budget[0] % len(paths)]
+            started = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+            status_line = await reader.readline()
+            content_length = 0
+            while True:
+                header_line = await reader.readline()
+                if header_line in (b"\r\n", b""):
+                    break
+                name, _, value = header_line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    content_length = int(value)
+            await reader.readexactly(content_length)
+            latencies.append(time.perf_counter() - started)
+            if status_line.split()[1:2] != [b"200"]:
+                errors[0] += 1
+    finally:
+        writer.close()
+
+async def load_test(host, port, requests, concurrency, seed=0):
+    # Fires a mix of frequency, window, time and target queries from
+    # concurrency parallel connections, returns the measured figures
+    rng = random.Random(seed)
+    paths = []
+    for i in range(1000):
+        khz = round(rng.uniform(2300, 26100))
+        kind = i % 4
+        if kind == 0:
+            paths.append(f"/query?freq={khz}")
+        elif kind == 1:
+            paths.append(f"/query?freq={khz}&span=25&active=1")
+        elif kind == 2:
+            paths.append(f"/query?freq={khz}&span=10&at={rng.choice(list(DAY_NUMBERS)[:7])}+{rng.randrange(24):02d}{rng.choice([0, 30]):02d}")
+        else:
+            paths.append(f"/query?freq={khz}&span=25&target={rng.choice(['eu', 'af', 'as', 'am'])}")
+    latencies, errors = [], [0]
+    request_budget = [requests]
+    started = time.perf_counter()
+    await asyncio.gather(*(_load_test_client(host, port, paths, request_budget, latencies, errors) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+def run_load_test(args):
+    try:
+        result = asyncio.run(load_test(args.host, args.port, args.requests, args.concurrency, args.seed))
+    except OSError as e:
+        print(f"Could not connect to http://{args.host}:{args.port}/: {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"{result['requests']} requests ({result['errors']} errors) from {result['concurrency']} connections in {result['seconds']} s")
+        print(f"{result['requests_per_second']} requests/s, latency p50 {result['p50_ms']} ms, p90 {result['p90_ms']} ms, p99 {result['p99_ms']} ms, max {result['max_ms']} ms")
+    return 0
+
+def run_query(args):
+    engine = ScheduleEngine()
+    engine.workers = args.workers
+    parser_class = {"eibi": EibiParser, "ilg": IlgParser}.get(args.type)
+    try:
+        parser = engine.load_files(args.file, parser_class)
+    except OSError as e:
+        print(f"Could not open {e.filename}: {e.strerror}", file=sys.stderr)
+        return 1
+    if parser.error:
+        return 1
+
+    active_time = None
+    if args.at:
+        active_time = parse_week_time(args.at)
+        if active_time is None:
+            print(f"Could not parse time '{args.at}', expected e.g. 'Sa 1800' or '1800'.", file=sys.stderr)
+            return 2
+        if active_time[0] is None:
+            active_time = (current_week_time()[0], active_time[1])
+    elif args.active:
+        active_time = current_week_time()
+
+    rows = engine.query(active_time, args.target or "", args.search or "", args.freq, args.span)
+    if args.limit is not None:
+        rows = rows[:args.limit]
+
+    if args.timings:
+        print(TIMINGS.to_json(), file=sys.stderr)
+    if args.json:
+        json.dump([engine.entry_dict(row) for row in rows], sys.stdout, indent=1, ensure_ascii=False)
+        print()
+    else:
+        render_cache = engine.render_cache()
+        print(engine.header_line().rstrip())
+        for row in rows:
+            print(render_cache.line(row).rstrip())
+    return 0
+
+# Subcommands of build_argument_parser, eibi_tuner.py hands only these to main()
+COMMANDS = ("query", "serve", "loadtest")
+
+def build_argument_parser():
+    argument_parser = argparse.ArgumentParser(prog="eibi_tuner", description="Query EIBI and ILG schedule files without the GUI.")
+    commands = argument_parser.add_subparsers(dest="command", required=True)
+    query = commands.add_parser("query", help="print the entries matching all given filters")
+    query.add_argument("--file", required=True, action="append", help="EIBI or ILG CSV file, several files are merged into one list")
+    query.add_argument("--type", choices=["eibi", "ilg"], help="file type, detected from the header if not given or if files are merged")
+    query.add_argument("--workers", type=int, help="processes parsing a file, 1 = none (default: one per core for files over 32 MB)")
+    query.add_argument("--active", action="store_true", help="only entries on air now")
+    query.add_argument("--at", metavar="TIME", help="only entries on air at TIME (UTC), e.g. 'Sa 1800' or '1800'")
+    query.add_argument("--freq", type=float, metavar="KHZ", help="only entries on this frequency")
+    query.add_argument("--span", type=float, metavar="KHZ", help="with --freq, accept entries within +/- KHZ")
+    query.add_argument("--target", help="only entries whose target contains this text")
+    query.add_argument("--search", help="only entries containing this text")
+    query.add_argument("--limit", type=int, help="print at most this many entries")
+    query.add_argument("--json", action="store_true", help="print the entries as JSON")
+    query.add_argument("--timings", action="store_true", help="print timing statistics to stderr")
+    query.set_defaults(handler=run_query)
+
+    serve = commands.add_parser("serve", help="answer queries over HTTP/JSON")
+    serve.add_argument("--file", required=True, action="append", help="EIBI or ILG CSV file, may be given more than once")
+    serve.add_argument("--type", choices=["eibi", "ilg"], help="file type, detected from the header if not given or if files are merged")
+    serve.add_argument("--merge", action="store_true", help="serve all files as one merged list")
+    serve.add_argument("--workers", type=int, help="processes parsing a file, 1 = none (default: one per core for files over 32 MB)")
+    serve.add_argument("--host", default="127.0.0.1", help="address to listen on (default 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=SERVER_PORT, help=f"port to listen on (default {SERVER_PORT})")
+    serve.add_argument("--timings", action="store_true", help="record timing statistics, see GET /timings")
+    serve.set_defaults(handler=run_serve)
+
+    loadtest = commands.add_parser("loadtest", help="measure requests per second and latency of a running server")
+    loadtest.add_argument("--host", default="127.0.0.1", help="server address (default 127.0.0.1)")
+    loadtest.add_argument("--port", type=int, default=SERVER_PORT, help=f"server port (default {SERVER_PORT})")
+    loadtest.add_argument("--requests", type=int, default=10000, help="number of requests to send (default 10000)")
+    loadtest.add_argument("--concurrency", type=int, default=32, help="parallel connections (default 32)")
+    loadtest.add_argument("--seed", type=int, default=0, help="seed of the query mix")
+    loadtest.add_argument("--json", action="store_true", help="print the result as JSON")
+    loadtest.set_defaults(handler=run_load_test)
+    return argument_parser
+
+def main(argv=None):
+    args = build_argument_parser().parse_args(argv)
+    if getattr(args, "timings", False):
+        TIMINGS.enabled = True
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
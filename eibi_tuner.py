@@ -2,10 +2,309 @@
 # ===============
 # Created by Peter Betz (DD2ZG) with support of Gemini 2.5
 #
+import sys
+
+import eibi_core
+
+# "eibi_tuner.py query ..." runs the command line of eibi_core without
+# opening a window, decided before tkinter is imported so it also works
+# where Tk is not available. Any other arguments start the GUI.
+if __name__ == "__main__" and sys.argv[1:2] and sys.argv[1] in eibi_core.COMMANDS:
+    sys.exit(eibi_core.main())
+
 import tkinter as tk
+import tkinter.font as tkfont
 from datetime import datetime, timezone
 from tkinter import filedialog, Listbox, Scrollbar
-import xmlrpc.client
+import bisect
+import os
+import queue
+import time
+
+from eibi_core import (
+    EibiParser, IlgParser, MergedScheduleParser, ScheduleEngine, FlrigRigGroup, BandScanner, FrequencyIndex,
+    SEARCH_KEYS_STEP, is_schedule_active, parse_rig_endpoints, parse_week_time, current_week_time,
+    parse_skip_list, build_scan_plan, bitset_rows, rows_bitset, format_week_minute, format_minutes, TIMINGS,
+    DAY_NUMBERS, SLOT_MINUTES, SLOTS_PER_DAY, OCCUPANCY_BIN_KHZ,
+)
+
+SEARCH_DEBOUNCE_MS = 200 # Pause in typing before the search filter is applied
+TIMELINE_MAX_TITLES = 3 # Entries named per part of the timeline line, the rest are counted
+FILE_WATCH_INTERVAL_MS = 2000 # Time between two checks of a watched file for changes
+
+# Band occupancy heatmap, see EibiTuner.show_occupancy_window
+OCCUPANCY_CELL_WIDTH = 14 # Pixels per half hour slot
+OCCUPANCY_CELL_HEIGHT = 12 # Pixels per frequency bin
+OCCUPANCY_LABEL_WIDTH = 110 # Pixels left of the grid for the frequency labels
+OCCUPANCY_COLOURS = ((255, 255, 204), (189, 0, 38)) # RGB of a cell with one entry and of the busiest cell
+
+def occupancy_colour(count, peak):
+    # Fill of a heatmap cell, shading from OCCUPANCY_COLOURS[0] to [1] as count nears peak
+    share = (count - 1) / (peak - 1) if peak > 1 else 1.0
+    low, high = OCCUPANCY_COLOURS
+    return "#" + "".join(f"{round(a + (b - a) * share):02x}" for a, b in zip(low, high))
+
+# (bg, fg) per rig of a matching active entry, a matching inactive entry and the marker line
+RIG_STYLES = [
+    (('yellow', 'black'), ('dark grey', 'white'), ('black', 'yellow')),
+    (('pale green', 'black'), ('dark olive green', 'white'), ('dark green', 'pale green')),
+    (('light sky blue', 'black'), ('slate gray', 'white'), ('navy', 'light sky blue')),
+    (('plum', 'black'), ('dim gray', 'white'), ('purple', 'plum')),
+]
+
+class VirtualList(tk.Frame):
+    # Canvas based replacement for tk.Listbox that only draws the rows inside
+    # the window. Row texts are pulled on demand from a callback, highlight
+    # colours are kept in a side map, so filling and scrolling cost depends on
+    # the window height instead of the number of rows. Single lines (like the
+    # frequency marker) can be inserted in between the rows with insert().
+    # Offers the parts of the Listbox interface this program uses.
+    def __init__(self, master=None, font=("Courier", 10), bg="white", fg="black", **options):
+        super().__init__(master, **options)
+        self.font = tkfont.Font(font=font)
+        self.line_height = self.font.metrics("linespace")
+        self.char_width = self.font.measure("0")
+        self.default_bg = bg
+        self.default_fg = fg
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0, borderwidth=0, takefocus=1)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.yscrollcommand = None
+        self.xscrollcommand = None
+        self.row_count = 0
+        self.row_text = lambda row: ""
+        self.inserted_positions = [] # Sorted positions of the lines added with insert()
+        self.inserted_texts = []
+        self.styles = {} # Position -> {'bg': ..., 'fg': ...} of highlighted lines
+        self.top = 0 # Position of the first visible line
+        self.x_offset = 0 # Horizontal scroll offset in pixels
+        self.content_chars = 0 # Width of the widest line in characters
+        self.redraw_pending = False
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        self.canvas.bind("<MouseWheel>", lambda event: self.yview_scroll(-3 if event.delta > 0 else 3, "units"))
+        self.canvas.bind("<Button-4>", lambda event: self.yview_scroll(-3, "units"))
+        self.canvas.bind("<Button-5>", lambda event: self.yview_scroll(3, "units"))
+        # Keyboard scrolling once the list has the focus. On release, as users
+        # of the list bind <Button-1> themselves.
+        self.canvas.bind("<ButtonRelease-1>", lambda event: self.canvas.focus_set())
+        self.canvas.bind("<Up>", lambda event: self.yview_scroll(-1, "units"))
+        self.canvas.bind("<Down>", lambda event: self.yview_scroll(1, "units"))
+        self.canvas.bind("<Prior>", lambda event: self.yview_scroll(-1, "pages"))
+        self.canvas.bind("<Next>", lambda event: self.yview_scroll(1, "pages"))
+        self.canvas.bind("<Home>", lambda event: self.yview("moveto", 0))
+        self.canvas.bind("<End>", lambda event: self.yview("moveto", 1))
+
+    def config(self, **options):
+        self.yscrollcommand = options.pop("yscrollcommand", self.yscrollcommand)
+        self.xscrollcommand = options.pop("xscrollcommand", self.xscrollcommand)
+        if options:
+            super().config(**options)
+    configure = config
+
+    def cget(self, key):
+        if key == "bg":
+            return self.default_bg
+        if key == "fg":
+            return self.default_fg
+        return super().cget(key)
+
+    def bind(self, sequence=None, func=None, add=None):
+        return self.canvas.bind(sequence, func, add)
+
+    def set_rows(self, row_count, row_text):
+        # Show row_count rows, row_text(row) returns the text of a row
+        self.row_count = row_count
+        self.row_text = row_text
+        self.inserted_positions = []
+        self.inserted_texts = []
+        self.styles = {}
+        self.top = min(self.top, max(self.size() - 1, 0))
+        self.redraw()
+
+    def set_row_count(self, row_count):
+        # More rows are available from the same row_text callback
+        self.row_count = row_count
+        self.redraw()
+
+    def set_content_width(self, chars):
+        self.content_chars = chars
+        self.redraw()
+
+    def size(self):
+        return self.row_count + len(self.inserted_positions)
+
+    def delete(self, first, last=None):
+        if first == 0 and last == tk.END:
+            self.set_rows(0, self.row_text)
+            return
+        # Only inserted lines can be deleted one by one
+        i = bisect.bisect_left(self.inserted_positions, first)
+        if i < len(self.inserted_positions) and self.inserted_positions[i] == first:
+            del self.inserted_positions[i]
+            del self.inserted_texts[i]
+            for j in range(i, len(self.inserted_positions)):
+                self.inserted_positions[j] -= 1
+            self._shift_styles(first, -1)
+            self.redraw()
+
+    def insert(self, position, text):
+        if position == tk.END:
+            position = self.size()
+        i = bisect.bisect_left(self.inserted_positions, position)
+        for j in range(i, len(self.inserted_positions)):
+            self.inserted_positions[j] += 1
+        self.inserted_positions.insert(i, position)
+        self.inserted_texts.insert(i, text)
+        self._shift_styles(position, 1)
+        self.redraw()
+
+    def _shift_styles(self, position, delta):
+        # Like a Listbox, the colours move with their lines
+        shifted = {}
+        for index, style in self.styles.items():
+            if index < position:
+                shifted[index] = style
+            elif index >= position + (1 if delta < 0 else 0):
+                shifted[index + delta] = style
+        self.styles = shifted
+
+    def line_text(self, position):
+        i = bisect.bisect_left(self.inserted_positions, position)
+        if i < len(self.inserted_positions) and self.inserted_positions[i] == position:
+            return self.inserted_texts[i]
+        return self.row_text(position - i)
+
+    def itemconfig(self, position, options):
+        if options.get("bg", self.default_bg) == self.default_bg and options.get("fg", self.default_fg) == self.default_fg:
+            self.styles.pop(position, None)
+        else:
+            self.styles[position] = dict(options)
+        self.redraw()
+
+    def selection_clear(self, first, last=None):
+        pass # Rows cannot be selected
+
+    def visible_lines(self):
+        return max(1, self.canvas.winfo_height() // self.line_height)
+
+    def nearest(self, y):
+        return max(0, min(self.size() - 1, self.top + int(y) // self.line_height))
+
+    def see(self, position):
+        if position < self.top:
+            self.top = position
+        elif position >= self.top + self.visible_lines():
+            self.top = position - self.visible_lines() + 1
+        self._clamp_top()
+        self.redraw()
+
+    def _clamp_top(self):
+        self.top = max(0, min(self.top, self.size() - self.visible_lines()))
+
+    def yview(self, *args):
+        size = max(self.size(), 1)
+        if not args:
+            return self.top / size, min(1.0, (self.top + self.visible_lines()) / size)
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * size)
+        elif args[0] == "scroll":
+            self.yview_scroll(int(args[1]), args[2])
+            return
+        self._clamp_top()
+        self.redraw()
+
+    def yview_scroll(self, number, what):
+        self.top += number * (self.visible_lines() if what == "pages" else 1)
+        self._clamp_top()
+        self.redraw()
+
+    def xview(self, *args):
+        content_width = max(self.content_chars * self.char_width, 1)
+        if not args:
+            return self.x_offset / content_width, min(1.0, (self.x_offset + self.canvas.winfo_width()) / content_width)
+        if args[0] == "moveto":
+            self.x_offset = int(float(args[1]) * content_width)
+        elif args[0] == "scroll":
+            step = self.canvas.winfo_width() if args[2] == "pages" else self.char_width
+            self.x_offset += int(args[1]) * step
+        self.x_offset = max(0, min(self.x_offset, content_width - self.canvas.winfo_width()))
+        self.redraw()
+
+    def redraw(self):
+        # Coalesce all changes of one event into a single redraw
+        if not self.redraw_pending:
+            self.redraw_pending = True
+            self.after_idle(self._draw)
+
+    def _draw(self):
+        draw_started = time.perf_counter()
+        self.redraw_pending = False
+        self.canvas.delete("all")
+        width = self.canvas.winfo_width()
+        last = min(self.size(), self.top + self.visible_lines() + 1)
+        for position in range(self.top, last):
+            y = (position - self.top) * self.line_height
+            text = self.line_text(position)
+            self.content_chars = max(self.content_chars, len(text))
+            style = self.styles.get(position)
+            fg = self.default_fg
+            if style:
+                fg = style.get("fg", fg)
+                if style.get("bg", self.default_bg) != self.default_bg:
+                    self.canvas.create_rectangle(0, y, width, y + self.line_height, fill=style["bg"], outline="")
+            self.canvas.create_text(2 - self.x_offset, y, anchor="nw", text=text, font=self.font, fill=fg)
+        if self.yscrollcommand:
+            self.yscrollcommand(*self.yview())
+        if self.xscrollcommand:
+            self.xscrollcommand(*self.xview())
+        TIMINGS.add("render", time.perf_counter() - draw_started)
+
+class HighlightEngine:
+    # Keeps the highlight colours and marker lines of a VirtualList in step with
+    # the wanted state. Each pass is compared with the previous one, so only
+    # rows whose colours changed are reconfigured and marker lines are only
+    # inserted or deleted when they move.
+    def __init__(self, listbox):
+        self.listbox = listbox
+        self.styles = {} # Displayed row -> (bg, fg)
+        self.markers = [] # Sorted (row to insert before, text, (bg, fg))
+
+    def reset(self):
+        # The list was refilled, nothing is highlighted any more
+        self.styles = {}
+        self.markers = []
+
+    def position(self, row):
+        # Line of a displayed row, counting the marker lines above it
+        return row + bisect.bisect_right([marker[0] for marker in self.markers], row)
+
+    def row_at(self, position):
+        # Displayed row of a line, a marker line maps to the row below it
+        row = position
+        for i, (marker_row, text, style) in enumerate(self.markers):
+            if marker_row + i < position:
+                row -= 1
+        return row
+
+    def apply(self, styles, markers):
+        markers = sorted(markers)
+        default = {'bg': self.listbox.cget("bg"), 'fg': self.listbox.cget("fg")}
+        if markers != self.markers:
+            for i in range(len(self.markers) - 1, -1, -1):
+                self.listbox.delete(self.markers[i][0] + i)
+            self.markers = []
+
+        for row in self.styles.keys() - styles.keys():
+            self.listbox.itemconfig(self.position(row), default)
+        for row, (bg, fg) in styles.items():
+            if self.styles.get(row) != (bg, fg):
+                self.listbox.itemconfig(self.position(row), {'bg': bg, 'fg': fg})
+        self.styles = dict(styles)
+
+        if markers != self.markers:
+            for i, (marker_row, text, (bg, fg)) in enumerate(markers):
+                self.listbox.insert(marker_row + i, text)
+                self.listbox.itemconfig(marker_row + i, {'bg': bg, 'fg': fg})
+            self.markers = markers
 
 class EibiTuner(tk.Frame):
     def __init__(self, master=None):
@@ -17,25 +316,38 @@ class EibiTuner(tk.Frame):
         self.after_id = None # To store the ID of the scheduled periodic update
         self.filter_term = tk.StringVar() # To store filter term
         self.filter_term.set("") # Initialize with empty string
-        self.all_data_lines = [] # To store all parsed data lines (dictionaries)
-        self.current_file_type = None # To store the type of the currently loaded file ("EIBI" or "ILG")
-        self.eibi_header_text = "kHZ           Time(UTC) Days  ITU Station                Lang. Target   Remarks"
-        self.eibi_column_names = [] # To store column names for EIBI files
-        self.eibi_column_widths = {} # To store calculated maximum widths for EIBI columns
-        self.ilg_column_names = [] # To store column names for ILG files
-        self.ilg_column_widths = {} # To store calculated maximum widths for ILG columns
-        self.temp_line_index = -1 # To track the index of the temporary frequency line
-        self.displayed_data_items = [] # To store data items currently displayed in the listbox
-        self.previous_highlights = [] # To store indices and original colors of previously highlighted items
-        self.last_flrig_freq_hz = None
+        self.engine = ScheduleEngine() # The loaded file, its indexes and caches
+        self.current_file_type = None # To store the type of the currently loaded file ("EIBI", "ILG" or "MERGED")
+        self.displayed_rows = [] # Row number in self.engine.table of each entry shown in the listbox
+        self.displayed_active_bits = None # Active rows the "Only active" view was built from
+        self.frequency_index = FrequencyIndex([]) # Sorted frequencies of displayed_rows
+        self.search_after_id = None # ID of the pending search-as-you-type update
+        self.search_keys_after_id = None # ID of the next search keys build step
+        self.last_rig_freqs_hz = {} # Rig -> frequency the highlights were last drawn for
         self.last_update_minute = None
+        self.rig_freqs_hz = {} # Rig -> latest frequency reported, unreachable rigs are left out
+        self.follow_rig = 0 # The list is centered on the rig that moved last
+        self.scanner = None # BandScanner while a scan is running
+        self.performance_window = None # Help -> Performance window while it is open
+        self.occupancy_window = None # View -> Band occupancy window while it is open
+        self.scan_active_bits = None # Rows on air when the scan plan was built
+        self.load_parser = None # Parser of the file currently being loaded
+        self.load_chunks = None # Chunk generator of the file currently being loaded
+        self.load_after_id = None # ID of the scheduled next load step
+        self.watch_file_var = tk.BooleanVar(value=False) # File -> Watch file for changes
+        self.watch_after_id = None # ID of the next check of the watched file
+        self.reload_steps = None # Generator re-reading the watched file after it changed
+        self.reload_after_id = None # ID of the scheduled next reload step
         self.create_widgets()
         self.create_menu()
         # Initialize view mode settings
-        self.last_flrig_freq_hz = None
+        self.last_rig_freqs_hz = {}
         self.last_update_minute = None
+        self.rigs = FlrigRigGroup() # One poller thread per rig
+        self.rigs.set_endpoints(self.rig_endpoints())
         self.update_listbox_display()
         self.update_utc_time() # Start updating UTC time
+        self.process_flrig_updates() # Start receiving frequencies from the poller thread
         self.update_view_mode_display() # Start updating view mode display
 
     def create_widgets(self):
@@ -54,12 +366,31 @@ class EibiTuner(tk.Frame):
         self.port_entry.insert(0, "12345")
         self.port_entry.pack(side=tk.LEFT)
 
+        # Further receivers as "host:port, host:port", each gets its own highlight colour
+        more_rigs_label = tk.Label(config_frame, text="More rigs:")
+        more_rigs_label.pack(side=tk.LEFT, padx=(5, 0))
+        self.more_rigs_var = tk.StringVar()
+        self.more_rigs_entry = tk.Entry(config_frame, textvariable=self.more_rigs_var, width=22, relief=tk.RIDGE, borderwidth=2)
+        self.more_rigs_entry.pack(side=tk.LEFT)
+        # The pollers follow edited rig fields once they are confirmed or left
+        for entry in (self.host_entry, self.port_entry, self.more_rigs_entry):
+            entry.bind("<Return>", self.on_rig_endpoints_change)
+            entry.bind("<FocusOut>", self.on_rig_endpoints_change)
+
 
 
         self.active_only_var = tk.BooleanVar()
         self.active_only_check = tk.Checkbutton(config_frame, text="Only active", variable=self.active_only_var, command=self.on_active_only_toggle)
         self.active_only_check.pack(side=tk.LEFT, padx=5)
 
+        # Optional point in the week for "Only active", e.g. "Sa 1800" (empty = now)
+        active_at_label = tk.Label(config_frame, text="at (UTC):")
+        active_at_label.pack(side=tk.LEFT)
+        self.active_at_var = tk.StringVar()
+        self.active_at_entry = tk.Entry(config_frame, textvariable=self.active_at_var, width=8, relief=tk.RIDGE, borderwidth=2)
+        self.active_at_entry.pack(side=tk.LEFT)
+        self.active_at_entry.bind("<Return>", self.on_active_at_change)
+
         target_label = tk.Label(config_frame, text="Target Filter:")
         target_label.pack(side=tk.LEFT, padx=(10, 0))
         self.target_filter_var = tk.StringVar()
@@ -72,6 +403,7 @@ class EibiTuner(tk.Frame):
         self.search_filter_entry = tk.Entry(config_frame, textvariable=self.filter_term, width=15, relief=tk.RIDGE, borderwidth=2)
         self.search_filter_entry.pack(side=tk.LEFT)
         self.search_filter_entry.bind("<Return>", self.on_search_filter_change)
+        self.filter_term.trace_add("write", self.on_search_typed)
         self.target_filter_entry.bind("<Return>", self.on_target_filter_change)
 
         # UTC Time Label
@@ -92,9 +424,10 @@ class EibiTuner(tk.Frame):
         main_list_frame = tk.Frame(list_frame)
         main_list_frame.pack(fill=tk.BOTH, expand=True)
 
-        self.listbox = Listbox(main_list_frame, font=("Courier", 10), selectmode=tk.NONE)
+        self.listbox = VirtualList(main_list_frame, font=("Courier", 10))
         self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.listbox.bind("<Button-1>", self.on_listbox_click)
+        self.highlighter = HighlightEngine(self.listbox)
 
         # Vertical Scrollbar
         v_scrollbar = Scrollbar(main_list_frame, orient=tk.VERTICAL, command=self.listbox.yview)
@@ -110,6 +443,30 @@ class EibiTuner(tk.Frame):
         self.header_listbox.config(xscrollcommand=self.h_scrollbar.set)
         self.h_scrollbar.config(command=self.on_horizontal_scroll)
 
+        # Load progress, with a button (or Escape) to cancel a running load
+        status_frame = tk.Frame(self)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=5)
+        self.load_progress_label = tk.Label(status_frame, text="", anchor="w")
+        self.load_progress_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.load_cancel_button = tk.Button(status_frame, text="Cancel", command=self.cancel_loading)
+        self.master.bind("<Escape>", self.cancel_loading)
+
+        # Band scan through the active frequencies of the list, tunes the first rig
+        self.scan_button = tk.Button(status_frame, text="Scan", command=self.toggle_scan)
+        self.scan_button.pack(side=tk.RIGHT)
+        self.scan_skip_var = tk.StringVar()
+        tk.Entry(status_frame, textvariable=self.scan_skip_var, width=16, relief=tk.RIDGE, borderwidth=2).pack(side=tk.RIGHT)
+        tk.Label(status_frame, text="Skip (kHz):").pack(side=tk.RIGHT)
+        self.scan_dwell_var = tk.StringVar(value="2")
+        tk.Entry(status_frame, textvariable=self.scan_dwell_var, width=4, relief=tk.RIDGE, borderwidth=2).pack(side=tk.RIGHT, padx=(0, 5))
+        tk.Label(status_frame, text="Dwell (s):").pack(side=tk.RIGHT)
+        self.scan_status_label = tk.Label(status_frame, text="", anchor="e")
+        self.scan_status_label.pack(side=tk.RIGHT, padx=5)
+
+        # On now / next up / just ended on the frequency the list follows
+        self.timeline_label = tk.Label(self, text="", anchor="w")
+        self.timeline_label.pack(side=tk.BOTTOM, fill=tk.X, padx=5)
+
     def show_about_dialog(self):
         about_dialog = tk.Toplevel(self.master)
         about_dialog.title("About eibi_tuner")
@@ -130,6 +487,152 @@ class EibiTuner(tk.Frame):
 
         self.master.wait_window(about_dialog) # Wait for dialog to close
 
+    def show_performance_window(self):
+        # Timing statistics of the hot paths, refreshed every second while open
+        if self.performance_window is not None:
+            self.performance_window.lift()
+            return
+        window = tk.Toplevel(self.master)
+        window.title("Performance")
+        self.performance_window = window
+
+        controls = tk.Frame(window)
+        controls.pack(fill=tk.X, padx=5, pady=5)
+        recording_var = tk.BooleanVar(value=TIMINGS.enabled)
+        def toggle_recording():
+            TIMINGS.enabled = recording_var.get()
+        tk.Checkbutton(controls, text="Record timings", variable=recording_var, command=toggle_recording).pack(side=tk.LEFT)
+        tk.Button(controls, text="Reset", command=TIMINGS.reset).pack(side=tk.LEFT, padx=5)
+        tk.Button(controls, text="Export JSON...", command=lambda: self.export_timings("json")).pack(side=tk.LEFT)
+        tk.Button(controls, text="Export CSV...", command=lambda: self.export_timings("csv")).pack(side=tk.LEFT, padx=5)
+
+        stats_text = tk.Text(window, font=("Courier", 10), width=96, height=20)
+        stats_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=(0, 5))
+
+        def refresh():
+            if self.performance_window is not window:
+                return
+            lines = [f"{'Operation':<20}{'Count':>8}{'Total ms':>12}{'Mean ms':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'Max ms':>10}"]
+            for row in TIMINGS.summary():
+                lines.append(f"{row['name']:<20}{row['count']:>8}{row['total_ms']:>12.1f}{row['mean_ms']:>10.3f}"
+                             f"{row['p50_ms']:>10.3f}{row['p90_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['max_ms']:>10.3f}")
+            if not TIMINGS.enabled:
+                lines.append("")
+                lines.append("Recording is off, tick \"Record timings\" to measure.")
+            # The poll rate adapts to tuning activity, its cost is always counted
+            rig_stats = self.rigs.poll_stats()
+            if rig_stats:
+                lines.append("")
+                lines.append(f"{'Rig':<28}{'Poll every s':>13}{'Polls/s':>9}{'Requests':>10}{'Failed':>8}{'RPC mean ms':>13}{'RPC p90 ms':>12}")
+                for stats in rig_stats:
+                    rig_name = f"{stats['rig'] + 1} {stats['endpoint']}"
+                    lines.append(f"{rig_name:<28}{stats['interval_s']:>13.2f}{stats['polls_per_second']:>9.2f}{stats['requests']:>10}"
+                                 f"{stats['failures']:>8}{stats['rpc_mean_ms']:>13.3f}{stats['rpc_p90_ms']:>12.3f}")
+            stats_text.config(state=tk.NORMAL)
+            stats_text.delete("1.0", tk.END)
+            stats_text.insert(tk.END, "\n".join(lines))
+            stats_text.config(state=tk.DISABLED)
+            window.after(1000, refresh)
+
+        def close():
+            self.performance_window = None
+            window.destroy()
+        window.protocol("WM_DELETE_WINDOW", close)
+        refresh()
+
+    def show_occupancy_window(self):
+        # Heatmap of the entries on air per frequency bin and half hour UTC slot
+        if self.occupancy_window is not None:
+            self.occupancy_window.lift()
+            return
+        window = tk.Toplevel(self.master)
+        window.title("Band occupancy")
+        self.occupancy_window = window
+
+        controls = tk.Frame(window)
+        controls.pack(fill=tk.X, padx=5, pady=5)
+        bin_var = tk.StringVar(value=str(OCCUPANCY_BIN_KHZ))
+        target_var = tk.StringVar(value=self.target_filter_var.get())
+        language_var = tk.StringVar()
+        day_var = tk.StringVar()
+        for label, var, width in (("Bin (kHz):", bin_var, 6), ("Target:", target_var, 8), ("Language:", language_var, 12), ("Day:", day_var, 4)):
+            tk.Label(controls, text=label).pack(side=tk.LEFT)
+            entry = tk.Entry(controls, textvariable=var, width=width, relief=tk.RIDGE, borderwidth=2)
+            entry.pack(side=tk.LEFT, padx=(0, 5))
+            entry.bind("<Return>", lambda event: refresh())
+        tk.Button(controls, text="Update", command=lambda: refresh()).pack(side=tk.LEFT)
+
+        status_label = tk.Label(window, text="", anchor="w")
+        status_label.pack(side=tk.BOTTOM, fill=tk.X, padx=5)
+        grid_frame = tk.Frame(window)
+        grid_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=(0, 5))
+        canvas = tk.Canvas(grid_frame, bg="white", width=OCCUPANCY_LABEL_WIDTH + SLOTS_PER_DAY * OCCUPANCY_CELL_WIDTH + 10, height=500)
+        scrollbar = Scrollbar(grid_frame, orient=tk.VERTICAL, command=canvas.yview)
+        canvas.config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        def refresh():
+            try:
+                bin_khz = float(bin_var.get())
+                if bin_khz <= 0:
+                    raise ValueError
+            except ValueError:
+                status_label.config(text="The bin width must be a positive number of kHz.")
+                return
+            weekday = None
+            if day_var.get().strip():
+                weekday = DAY_NUMBERS.get(day_var.get().strip().capitalize())
+                if weekday is None:
+                    status_label.config(text="The day must be Mo .. Su, or empty for all days.")
+                    return
+            started = time.perf_counter()
+            heatmap = self.engine.occupancy(bin_khz, target_var.get().strip(), language_var.get().strip(), weekday)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.draw_occupancy(canvas, heatmap, bin_khz)
+            method = "NumPy" if eibi_core.load_numpy() is not None else "plain Python"
+            status_label.config(text=f"{len(heatmap)} frequency bins, counted in {elapsed_ms:.1f} ms ({method}). The line marks the current slot.")
+
+        def close():
+            self.occupancy_window = None
+            window.destroy()
+        window.protocol("WM_DELETE_WINDOW", close)
+        refresh()
+
+    def draw_occupancy(self, canvas, heatmap, bin_khz):
+        # One row of cells per frequency bin, one column per half hour slot from 0000 UTC
+        canvas.delete("all")
+        font = ("Courier", 9)
+        top = OCCUPANCY_CELL_HEIGHT + 4
+        for hour in range(0, 24, 2):
+            canvas.create_text(OCCUPANCY_LABEL_WIDTH + hour * 60 // SLOT_MINUTES * OCCUPANCY_CELL_WIDTH, top - 2, text=f"{hour:02d}", anchor="sw", font=font)
+        peak = max((max(counts) for low_khz, counts in heatmap), default=0)
+        for i, (low_khz, counts) in enumerate(heatmap):
+            y = top + i * OCCUPANCY_CELL_HEIGHT
+            canvas.create_text(OCCUPANCY_LABEL_WIDTH - 4, y + OCCUPANCY_CELL_HEIGHT // 2, text=f"{low_khz:g}-{low_khz + bin_khz:g}", anchor="e", font=font)
+            for slot, count in enumerate(counts):
+                if count:
+                    x = OCCUPANCY_LABEL_WIDTH + slot * OCCUPANCY_CELL_WIDTH
+                    canvas.create_rectangle(x, y, x + OCCUPANCY_CELL_WIDTH, y + OCCUPANCY_CELL_HEIGHT, fill=occupancy_colour(count, peak), outline="")
+        bottom = top + len(heatmap) * OCCUPANCY_CELL_HEIGHT
+        x = OCCUPANCY_LABEL_WIDTH + current_week_time()[1] // SLOT_MINUTES * OCCUPANCY_CELL_WIDTH
+        canvas.create_line(x, top, x, bottom, fill="blue")
+        canvas.config(scrollregion=(0, 0, OCCUPANCY_LABEL_WIDTH + SLOTS_PER_DAY * OCCUPANCY_CELL_WIDTH + 10, bottom + 4))
+
+    def export_timings(self, file_format):
+        filepath = filedialog.asksaveasfilename(
+            title="Export timings",
+            defaultextension="." + file_format,
+            filetypes=((file_format.upper() + " files", "*." + file_format), ("All files", "*.*"))
+        )
+        if not filepath:
+            return
+        try:
+            with open(filepath, "w", encoding="utf-8", newline="") as f:
+                f.write(TIMINGS.to_json() if file_format == "json" else TIMINGS.to_csv())
+        except OSError as e:
+            print(f"Could not write {filepath}: {e}")
+
     def on_horizontal_scroll(self, *args):
         self.listbox.xview(*args)
         self.header_listbox.xview(*args)
@@ -139,71 +642,6 @@ class EibiTuner(tk.Frame):
         self.utc_time_label.config(text=f"UTC: {now_utc.strftime('%H:%M:%S')}")
         self.master.after(1000, self.update_utc_time) # Update every 1 second
 
-    def _is_time_valid(self, time_range_str, current_utc_time):
-        if not time_range_str or time_range_str == "0000-2400":
-            return True
-
-        try:
-            start_str, end_str = time_range_str.split('-')
-            start_hour = int(start_str[:2])
-            start_minute = int(start_str[2:])
-            end_hour = int(end_str[:2])
-            end_minute = int(end_str[2:])
-
-            current_minutes = current_utc_time.hour * 60 + current_utc_time.minute
-            start_minutes = start_hour * 60 + start_minute
-            end_minutes = end_hour * 60 + end_minute
-
-            if start_minutes <= end_minutes:
-                return start_minutes <= current_minutes < end_minutes
-            else: # Overnight schedule, e.g., 2300-0100
-                return current_minutes >= start_minutes or current_minutes < end_minutes
-        except (ValueError, IndexError):
-            return False
-
-    def _is_day_valid(self, days_str, current_utc_weekday):
-        if not days_str:
-            return True # Empty days string means all days
-
-        day_map = {
-            "Mo": 0, "Tu": 1, "We": 2, "Th": 3, "Fr": 4, "Sa": 5, "Su": 6,
-            "1": 0, "2": 1, "3": 2, "4": 3, "5": 4, "6": 5, "7": 6
-        }
-
-        valid_weekdays = set()
-
-        # Handle ranges like We-Mo or 1-7
-        if '-' in days_str:
-            start_day_str, end_day_str = days_str.split('-')
-            start_day_int = day_map.get(start_day_str)
-            end_day_int = day_map.get(end_day_str)
-
-            if start_day_int is not None and end_day_int is not None:
-                if start_day_int <= end_day_int:
-                    for i in range(start_day_int, end_day_int + 1):
-                        valid_weekdays.add(i)
-                else: # Overnight range, e.g., Friday to Monday
-                    for i in range(start_day_int, 7):
-                        valid_weekdays.add(i)
-                    for i in range(0, end_day_int + 1):
-                        valid_weekdays.add(i)
-        else: # Handles single day abbreviations, or sequences like '1234567' or '.2.4.6.'
-            found_digit_day = False
-            for char in days_str:
-                if char.isdigit():
-                    day_int = day_map.get(char)
-                    if day_int is not None:
-                        valid_weekdays.add(day_int)
-                        found_digit_day = True
-
-            # If no digit days were found, try to parse the whole string as an abbreviation
-            if not found_digit_day:
-                day_int = day_map.get(days_str.strip())
-                if day_int is not None:
-                    valid_weekdays.add(day_int)
-
-        return current_utc_weekday in valid_weekdays
-
     def create_menu(self):
         menubar = tk.Menu(self.master)
         self.master.config(menu=menubar)
@@ -212,13 +650,21 @@ class EibiTuner(tk.Frame):
         file_menu = tk.Menu(menubar, tearoff=0)
         file_menu.add_command(label="Open EIBI .csv file...", command=self.open_eibi_file_dialog)
         file_menu.add_command(label="Open ILG .csv file...", command=self.open_ilg_file_dialog)
+        file_menu.add_command(label="Open several files as one list...", command=self.open_merged_files_dialog)
+        file_menu.add_checkbutton(label="Watch file for changes", variable=self.watch_file_var, command=self.on_watch_file_toggle)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.master.quit)
         menubar.add_cascade(label="File", menu=file_menu)
 
-        about_menu = tk.Menu(menubar, tearoff=0)
-        about_menu.add_command(label="About", command=self.show_about_dialog)
-        menubar.add_cascade(label="About", menu=about_menu)
+        view_menu = tk.Menu(menubar, tearoff=0)
+        view_menu.add_command(label="Band occupancy...", command=self.show_occupancy_window)
+        menubar.add_cascade(label="View", menu=view_menu)
+
+        help_menu = tk.Menu(menubar, tearoff=0)
+        help_menu.add_command(label="Performance...", command=self.show_performance_window)
+        help_menu.add_separator()
+        help_menu.add_command(label="About", command=self.show_about_dialog)
+        menubar.add_cascade(label="Help", menu=help_menu)
 
 
         
@@ -233,88 +679,7 @@ class EibiTuner(tk.Frame):
             self._load_eibi_file_csv(filepath)
 
     def _load_eibi_file_csv(self, filepath):
-        # Reset last-update state to force a refresh
-        self.last_flrig_freq_hz = None
-        self.last_update_minute = None
-
-        self.current_filepath = filepath
-        self.current_file_type = "EIBI"
-        self.all_data_lines.clear()
-        self.eibi_column_names.clear()
-
-        now_utc = datetime.now(timezone.utc)
-        current_utc_weekday = now_utc.weekday()
-
-        with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-            lines = f.readlines()
-            if not lines:
-                print("Error: EIBI CSV file is empty.")
-                return
-
-            # Parse header line
-            header_line = lines[0].strip()
-            raw_column_names = header_line.split(';')
-            self.eibi_column_names = [col.split(':')[0].strip() for col in raw_column_names if col.strip()]
-            
-            if not self.eibi_column_names:
-                print("Error: Could not parse header line in EIBI CSV file.")
-                return
-
-            # Process data lines
-            for line in lines[1:]: # Skip header line
-                stripped_line = line.strip()
-                parts = stripped_line.split(';')
-                
-                if not parts or not parts[0].replace('.', '', 1).isdigit(): # Check if the first part is a number (frequency)
-                    continue # Skip lines that don't start with a frequency
-
-                try:
-                    data_item = {}
-                    for j, col_name in enumerate(self.eibi_column_names):
-                        if j < len(parts):
-                            data_item[col_name] = parts[j].strip()
-                        else:
-                            data_item[col_name] = ""
-                    
-                    # Convert frequency to float
-                    data_item["kHz"] = float(data_item["kHz"])
-
-                    if self.active_only_var.get():
-                        time_range_str = data_item.get("Time(UTC)", "")
-                        days_str = data_item.get("Days", "")
-                        time_valid = self._is_time_valid(time_range_str, now_utc)
-                        day_valid = self._is_day_valid(days_str, current_utc_weekday)
-                        if not time_valid or not day_valid:
-                            continue
-
-                    target_filter = self.target_filter_var.get()
-                    if target_filter:
-                        target_str = data_item.get("Target", "")
-                        if target_filter.lower() not in target_str.lower():
-                            continue
-
-                    self.all_data_lines.append(data_item)
-                except (ValueError, KeyError) as e:
-                    print(f"Skipping EIBI line due to parsing error: {e} in line: {stripped_line}")
-                    continue
-        
-        # Calculate maximum column widths for EIBI data
-        self.eibi_column_widths = {col: len(col) for col in self.eibi_column_names}
-        for data_item in self.all_data_lines:
-            for col_name, value in data_item.items():
-                if col_name == "kHz":
-                    formatted_len = len(f"{value:<.2f}") # Consider 2 decimal places
-                else:
-                    formatted_len = len(str(value))
-                if col_name in self.eibi_column_widths:
-                    self.eibi_column_widths[col_name] = max(self.eibi_column_widths.get(col_name, 0), formatted_len)
-        
-        # Add a small padding to each column width
-        for col_name in self.eibi_column_widths:
-            self.eibi_column_widths[col_name] += 2 # 2 spaces padding
-
-        self.update_header_and_listbox_display()
-        self.update_view_mode_display()
+        self.start_loading(EibiParser, filepath)
 
     def open_ilg_file_dialog(self):
         filepath = filedialog.askopenfilename(
@@ -325,113 +690,199 @@ class EibiTuner(tk.Frame):
             self.load_ilg_file(filepath)
 
     def load_ilg_file(self, filepath):
+        self.start_loading(IlgParser, filepath)
+
+    def open_merged_files_dialog(self):
+        filepaths = filedialog.askopenfilenames(
+            title="Open EIBI, ILG or local lists to merge",
+            filetypes=(("CSV files", "*.csv"), ("All files", "*.*"))
+        )
+        if filepaths:
+            self.load_merged_files(filepaths)
+
+    def load_merged_files(self, filepaths):
+        # EIBI and ILG files in any mix, shown as one list in frequency order
+        self.stop_loading()
+        try:
+            parser = MergedScheduleParser(filepaths)
+        except OSError as e:
+            print(f"Could not open {e.filename}: {e.strerror}")
+            return
+        self.start_loading_parser(parser)
+
+    def start_loading(self, parser_class, filepath):
+        self.stop_loading()
+        try:
+            parser = parser_class(filepath)
+        except OSError as e:
+            print(f"Could not open {filepath}: {e}")
+            return
+        self.start_loading_parser(parser)
+
+    def start_loading_parser(self, parser):
+        # Parse the file in chunks from after() callbacks, rows show up while it loads
         # Reset last-update state to force a refresh
-        self.last_flrig_freq_hz = None
+        self.last_rig_freqs_hz = {}
         self.last_update_minute = None
 
-        self.current_filepath = filepath
-        self.current_file_type = "ILG"
-        self.all_data_lines.clear()
-        self.ilg_column_names.clear()
+        self.current_filepath = parser.filepath
+        self.current_file_type = parser.file_type
+        # An unchanged file is read from the parse cache instead of being parsed again
+        from_cache = self.engine.start(parser)
 
-        now_utc = datetime.now(timezone.utc)
-        current_utc_weekday = now_utc.weekday()
+        self.displayed_rows.clear()
+        self.listbox.set_rows(0, self.displayed_line)
+        self.highlighter.reset()
+        self.frequency_index = FrequencyIndex([])
 
-        with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-            lines = f.readlines()
-            header_found = False
-            for i, line in enumerate(lines):
-                stripped_line = line.strip()
-                if "FREQkhz" in stripped_line and not stripped_line.startswith(('##', '###')):
-                    # This is likely the header line
-                    raw_column_names = stripped_line.split(';')
-                    self.ilg_column_names = [col.replace('##', '').replace('###', '').strip() for col in raw_column_names]
-                    # Remove empty strings from column names
-                    self.ilg_column_names = [col for col in self.ilg_column_names if col]
-                    header_found = True
-                    # Start processing data from the next line
-                    data_start_index = i + 1
-                    break
-            
-            if not header_found:
-                print("Error: Could not find a suitable header line in the ILG file.")
-                return
+        self.load_parser = parser
+        if from_cache:
+            self.finish_loading()
+            return
 
-            cols_to_exclude = [
-                "24 HOURS TIMES BY LINES IN 30 MINUTE UTC STEPS", 
-                "AZI", 
-                "REMARKS/COMMENT", 
-                "M", 
-                "CIRAFZONES - RECEPTION ZONES", 
-                "COUNTRY OF TRANSM.", 
-                "POSITION: LONGI,LATI", 
-                "B", "S", "YY,", 
-                "CALL SIGN - NETWORK IDENTIFICATION", 
-                "Start", "Stop",
-                "TARGET AREA MATRIX",
-                "STN",
-                "LONGI",
-                "LATI"
-            ]
-
-            for line in lines[data_start_index:]:
-                parts = line.strip().split(';')
-                if len(parts) > 0 and parts[0].replace('.', '', 1).isdigit(): # Check if the first part is a number (frequency)
-                    try:
-                        data_item = {}
-                        for j, col_name in enumerate(self.ilg_column_names):
-                            if j < len(parts):
-                                data_item[col_name] = parts[j].strip()
-                            else:
-                                data_item[col_name] = ""
-                        
-                        for col in cols_to_exclude:
-                            if col in data_item:
-                                del data_item[col]
-
-                        # Convert frequency to float
-                        data_item["FREQkhz"] = float(data_item["FREQkhz"])
-
-                        if self.active_only_var.get():
-                            time_range_str = data_item.get("TIMES:UTC", "")
-                            days_str = data_item.get("1=Sun", "")
-                            time_valid = self._is_time_valid(time_range_str, now_utc)
-                            day_valid = self._is_day_valid(days_str, current_utc_weekday)
-                            if not time_valid or not day_valid:
-                                continue
-
-                        target_filter = self.target_filter_var.get()
-                        if target_filter:
-                            target_str = data_item.get("TARGET", "")
-                            if target_filter.lower() not in target_str.lower():
-                                continue
-
-                        self.all_data_lines.append(data_item)
-                    except (ValueError, KeyError):
-                        # Skip lines where frequency cannot be parsed or a key is missing
-                        continue
-        
-        # Filter column names list
-        self.ilg_column_names = [col for col in self.ilg_column_names if col not in cols_to_exclude]
-
-        # Calculate maximum column widths for ILG data
-        self.ilg_column_widths = {col: len(col) for col in self.ilg_column_names}
-        for data_item in self.all_data_lines:
-            for col_name, value in data_item.items():
-                # Special handling for float formatting of FREQkhz
-                if col_name == "FREQkhz":
-                    formatted_len = len(f"{value:<.2f}") # Consider 2 decimal places
-                else:
-                    formatted_len = len(str(value))
-                if col_name in self.ilg_column_widths:
-                    self.ilg_column_widths[col_name] = max(self.ilg_column_widths.get(col_name, 0), formatted_len)
-        
-        # Add a small padding to each column width
-        for col_name in self.ilg_column_widths:
-            self.ilg_column_widths[col_name] += 2 # 2 spaces padding
+        # Large files are parsed by worker processes, the rows arrive in larger steps
+        self.load_chunks = self.engine.parse_steps(parser)
+        self.load_cancel_button.pack(side=tk.RIGHT)
+        self.load_after_id = self.master.after(1, self.load_next_chunk)
+
+    def load_next_chunk(self):
+        parser = self.load_parser
+        table = self.engine.table
+        first_row = len(table)
+        try:
+            parsed = next(self.load_chunks)
+        except StopIteration:
+            self.finish_loading()
+            return
 
+        # Column widths grow while the file is read, the final layout is applied when done
+        self.engine.update_layout(parser)
+        self.update_header_display()
+
+        weekday, minute_of_day = self.active_filter_time()
+        active_only = self.active_only_var.get()
+        target_filter = self.target_filter_var.get().lower()
+        filter_value = self.filter_term.get().lower()
+        # The padded lines are only needed here for a search, the list makes them when it draws
+        render_cache = self.engine.render_cache() if filter_value else None
+        for row in range(first_row, len(table)):
+            if active_only and not is_schedule_active(table.schedule(row), weekday, minute_of_day):
+                continue
+            if target_filter and target_filter not in table.value(row, parser.target_column, "").lower():
+                continue
+            if not filter_value or filter_value in render_cache.search_key(row):
+                self.displayed_rows.append(row)
+        self.listbox.set_row_count(len(self.displayed_rows))
+
+        percent = 100 * parser.bytes_read // max(parser.total_bytes, 1)
+        self.load_progress_label.config(text=f"Loading {os.path.basename(parser.filepath)}: {percent}% ({parser.row_count} rows)")
+        # Waiting for a worker process does not need to poll that often
+        self.load_after_id = self.master.after(1 if parsed else 20, self.load_next_chunk)
+
+    def finish_loading(self):
+        parser = self.load_parser
+        self.stop_loading()
+        self.engine.finish(parser)
         self.update_header_and_listbox_display()
         self.update_view_mode_display()
+        self.build_search_keys()
+
+    def stop_loading(self):
+        self.stop_reload()
+        if self.search_keys_after_id is not None:
+            self.master.after_cancel(self.search_keys_after_id)
+            self.search_keys_after_id = None
+        if self.load_after_id is not None:
+            self.master.after_cancel(self.load_after_id)
+            self.load_after_id = None
+        if self.load_chunks is not None:
+            self.load_chunks.close() # Closes the file
+            self.load_chunks = None
+        self.load_cancel_button.pack_forget()
+        self.load_progress_label.config(text="")
+
+    def cancel_loading(self, event=None):
+        # Keep what has been read so far
+        if self.load_chunks is not None:
+            print(f"Loading of {self.load_parser.filepath} cancelled after {len(self.engine.table)} rows.")
+            self.finish_loading()
+
+    def on_watch_file_toggle(self):
+        if self.watch_after_id is not None:
+            self.master.after_cancel(self.watch_after_id)
+            self.watch_after_id = None
+        if self.watch_file_var.get():
+            self.watch_after_id = self.master.after(FILE_WATCH_INTERVAL_MS, self.check_watched_file)
+        else:
+            self.stop_reload()
+
+    def check_watched_file(self):
+        # Poll the modification time of the loaded files, a change is read
+        # in chunks like a normal load and only the differences are applied
+        self.watch_after_id = None
+        if not self.watch_file_var.get():
+            return
+        if self.load_chunks is None and self.reload_steps is None and self.engine.files_changed():
+            try:
+                self.reload_steps = self.engine.reload_steps()
+                self.reload_next_chunk()
+            except OSError as e:
+                print(f"Could not read changed file {self.engine.filepath}: {e}")
+                self.reload_steps = None
+        self.watch_after_id = self.master.after(FILE_WATCH_INTERVAL_MS, self.check_watched_file)
+
+    def reload_next_chunk(self):
+        self.reload_after_id = None
+        try:
+            next(self.reload_steps)
+        except StopIteration as stop:
+            self.reload_steps = None
+            self.apply_file_changes(stop.value)
+            return
+        except OSError as e:
+            print(f"Could not read changed file {self.engine.filepath}: {e}")
+            self.reload_steps = None
+            return
+        self.reload_after_id = self.master.after(1, self.reload_next_chunk)
+
+    def stop_reload(self):
+        if self.reload_after_id is not None:
+            self.master.after_cancel(self.reload_after_id)
+            self.reload_after_id = None
+        if self.reload_steps is not None:
+            self.reload_steps.close()
+            self.reload_steps = None
+
+    def apply_file_changes(self, changes):
+        # Show the changed rows, keeping the first visible entry at the top
+        # and the rig highlights where they are instead of re-centering
+        if changes is None:
+            return
+        inserted, deleted, updated = changes
+        print(f"{os.path.basename(self.engine.filepath)} changed: {inserted} added, {deleted} removed, {updated} changed.")
+        top_index = self.highlighter.row_at(self.listbox.top)
+        top_row = self.displayed_rows[top_index] if top_index < len(self.displayed_rows) else None
+
+        self.update_header_and_listbox_display()
+        self.update_view_mode_display(force_update=True, center=False)
+        if top_row is not None and top_row in self.displayed_rows:
+            self.listbox.top = self.highlighter.position(self.displayed_rows.index(top_row))
+            self.listbox.yview_scroll(0, 'units')
+        self.build_search_keys()
+
+    def active_filter_time(self):
+        # (weekday, minute of day) the "Only active" filter applies to
+        weekday, minute_of_day = current_week_time()
+        at_text = self.active_at_var.get().strip()
+        if at_text:
+            parsed = parse_week_time(at_text)
+            if parsed is None:
+                print(f"Could not parse time '{at_text}', expected e.g. 'Sa 1800' or '1800'. Using current time.")
+            else:
+                if parsed[0] is not None:
+                    weekday = parsed[0]
+                minute_of_day = parsed[1]
+        return weekday, minute_of_day
 
     def on_select(self, event):
         # This method is no longer used as selection is disabled.
@@ -443,20 +894,12 @@ class EibiTuner(tk.Frame):
         # Get the index of the item clicked
         index = self.listbox.nearest(event.y)
         
-        # Adjust index if a temporary line is present above the clicked item
-        if self.temp_line_index != -1 and index > self.temp_line_index:
-            adjusted_index = index - 1
-        else:
-            adjusted_index = index
-            
-        if 0 <= adjusted_index < len(self.displayed_data_items):
-            data_item = self.displayed_data_items[adjusted_index]
-            frequency_khz = None
+        # Adjust index for marker lines above the clicked item
+        adjusted_index = self.highlighter.row_at(index)
 
-            if self.current_file_type == "EIBI":
-                frequency_khz = data_item.get("kHz")
-            elif self.current_file_type == "ILG":
-                frequency_khz = data_item.get("FREQkhz")
+        if 0 <= adjusted_index < len(self.displayed_rows):
+            data_item = self.engine.table[self.displayed_rows[adjusted_index]]
+            frequency_khz = data_item.get(self.engine.table.frequency_column)
 
             if frequency_khz is not None:
                 try:
@@ -471,165 +914,177 @@ class EibiTuner(tk.Frame):
         else:
             print(f"Clicked outside valid item range or no items displayed. Index: {index}.")
         return "break"
+    def on_rig_endpoints_change(self, event):
+        self.rigs.set_endpoints(self.rig_endpoints())
+
+    def rig_endpoints(self):
+        # The rig of the host and port entries comes first, click-to-tune tunes it
+        return [(self.host_entry.get(), self.port_entry.get())] + parse_rig_endpoints(self.more_rigs_var.get(), self.port_entry.get())
+
     def set_flrig_frequency(self, frequency_hz):
-        host = self.host_entry.get()
-        port = self.port_entry.get()
-        try:
-            server_url = f"http://{host}:{port}"
-            server = xmlrpc.client.ServerProxy(server_url)
-            server.main.set_frequency(float(frequency_hz))
-            print(f"Frequency set to: {frequency_hz} Hz")
-            # server.rig.set_mode("USB")
-            # print("Mode set to: USB")
-        except ConnectionRefusedError:
-            print("Connection to FLRIG refused. Is FLRIG running?")
-        except Exception as e:
-            print(f"An error occurred while setting frequency: {e}")
-
-    def get_flrig_frequency(self):
-        host = self.host_entry.get()
-        port = self.port_entry.get()
-        try:
-            server_url = f"http://{host}:{port}"
-            server = xmlrpc.client.ServerProxy(server_url)
-            frequency_raw = server.rig.get_vfo()
+        # The poller thread sends the command, so a slow FLRIG never blocks the UI
+        self.rigs.set_endpoints(self.rig_endpoints())
+        self.rigs.tune(0, frequency_hz)
+        # Assume the rig follows, the poller confirms (or corrects) it shortly
+        self.rig_freqs_hz[0] = float(frequency_hz)
+        self.follow_rig = 0
+
+    def rig_frequencies_changed(self):
+        # True if a rig moved by 10 Hz or more, came up or went away since the last update
+        if self.rig_freqs_hz.keys() != self.last_rig_freqs_hz.keys():
+            return True
+        return any(abs(frequency_hz - self.last_rig_freqs_hz[rig]) >= 10 for rig, frequency_hz in self.rig_freqs_hz.items())
+
+    def process_flrig_updates(self):
+        while True:
             try:
-                frequency_hz = float(frequency_raw)
-                return frequency_hz
-            except ValueError:
-                print(f"Could not convert FLRIG frequency '{frequency_raw}' to a number.")
-                return None
-        except ConnectionRefusedError:
-            print("Connection to FLRIG refused. Is FLRIG running?")
-            return None
-            print(f"An error occurred while getting frequency: {e}")
-            return None
-
-    def update_view_mode_display(self, force_update=False):
-        now_utc = datetime.now(timezone.utc)
-        current_flrig_freq_hz = self.get_flrig_frequency()
+                rig, frequency_hz = self.rigs.updates.get_nowait()
+            except queue.Empty:
+                break
+            if rig >= len(self.rigs):
+                continue # From a rig that has just been removed
+            if frequency_hz is None:
+                self.rig_freqs_hz.pop(rig, None)
+            else:
+                previous_hz = self.rig_freqs_hz.get(rig)
+                if previous_hz is None or abs(frequency_hz - previous_hz) >= 10:
+                    self.follow_rig = rig
+                self.rig_freqs_hz[rig] = frequency_hz
+        for rig in [rig for rig in self.rig_freqs_hz if rig >= len(self.rigs)]:
+            del self.rig_freqs_hz[rig]
+
+        if self.scanner is not None:
+            step, plan_length, current_khz = self.scanner.position()
+            if current_khz is not None:
+                self.scan_status_label.config(text=f"Scan {step}/{plan_length}: {current_khz:.2f} kHz")
+
+        # Follow a new rig frequency right away instead of waiting for the next tick
+        if self.rig_frequencies_changed():
+            self.update_view_mode_display()
+        self.master.after(100, self.process_flrig_updates)
+
+    def scan_plan(self):
+        # Sorted unique frequencies of the listed entries that are on air now
+        self.scan_active_bits = self.engine.activity_index.active_at(*current_week_time())
+        displayed_bits = rows_bitset(self.displayed_rows, len(self.engine.table))
+        rows = bitset_rows(displayed_bits & self.scan_active_bits)
+        return build_scan_plan((self.engine.table.khz[row] for row in rows), parse_skip_list(self.scan_skip_var.get()))
+
+    def toggle_scan(self):
+        if self.scanner is not None:
+            self.stop_scan()
+            return
+        try:
+            dwell = float(self.scan_dwell_var.get())
+        except ValueError:
+            dwell = 0
+        if dwell <= 0:
+            print(f"Invalid dwell time '{self.scan_dwell_var.get()}', expected seconds, e.g. 2 or 0.5.")
+            return
+        plan = self.scan_plan()
+        if not plan:
+            print("Nothing to scan: no listed entry is on air now.")
+            return
+        self.rigs.set_endpoints(self.rig_endpoints())
+        self.scanner = BandScanner(self.host_entry.get(), self.port_entry.get(), plan, dwell, updates=self.rigs.updates, rig=0)
+        self.scanner.start()
+        self.scan_button.config(text="Stop scan")
+        print(f"Scanning {len(plan)} frequencies, {dwell} s each.")
+
+    def stop_scan(self):
+        scanner, self.scanner = self.scanner, None
+        scanner.stop()
+        self.scan_button.config(text="Scan")
+        self.scan_status_label.config(text="")
+        stats = scanner.timing_stats()
+        print(f"Scan stopped after {stats['steps']} steps: interval {stats['interval_mean_ms']} ms "
+              f"(stdev {stats['interval_stdev_ms']} ms, dwell {stats['dwell_ms']} ms), "
+              f"lateness p50 {stats['lateness_p50_ms']} ms, p99 {stats['lateness_p99_ms']} ms, max {stats['lateness_max_ms']} ms, "
+              f"FLRIG round trip p50 {stats['round_trip_p50_ms']} ms, p99 {stats['round_trip_p99_ms']} ms, {stats['overruns']} overruns")
+
+    def update_scan_plan(self):
+        # The plan follows the list and the stations going on or off air
+        if self.scanner is not None:
+            self.scanner.set_plan(self.scan_plan())
+
+    def schedule_view_mode_display(self):
+        # Keep exactly one pending periodic update, no matter how often we are called
+        if self.after_id is not None:
+            self.master.after_cancel(self.after_id)
+            self.after_id = None
+        if self.mode == "View":
+            self.after_id = self.master.after(1000, self.update_view_mode_display)
 
-        freq_changed = True
-        if current_flrig_freq_hz is not None and self.last_flrig_freq_hz is not None:
-            if abs(current_flrig_freq_hz - self.last_flrig_freq_hz) < 10: # 10 Hz tolerance
-                freq_changed = False
-        
+    def update_view_mode_display(self, force_update=False, center=True):
+        # Highlighting waits until the file is completely loaded
+        if self.load_chunks is not None:
+            self.schedule_view_mode_display()
+            return
+
+        now_utc = datetime.now(timezone.utc)
+        rig_freqs_hz = dict(self.rig_freqs_hz)
+        freq_changed = self.rig_frequencies_changed()
         minute_changed = now_utc.minute != self.last_update_minute
 
         # If nothing significant changed, and not forced, just reschedule and exit
         if not force_update and not freq_changed and not minute_changed:
-            if self.mode == "View":
-                self.after_id = self.master.after(1000, self.update_view_mode_display)
+            self.schedule_view_mode_display()
             return
 
         # Update last known values
         self.last_update_minute = now_utc.minute
-        if current_flrig_freq_hz is not None:
-            self.last_flrig_freq_hz = current_flrig_freq_hz
-
-        # Check if a temporary line was present and needs to be removed
-        temp_line_was_present = (self.temp_line_index != -1)
-        if temp_line_was_present:
-            # If a temp line was present, and we are now going to highlight actual matches,
-            # or if the target frequency changed, we need to rebuild the listbox
-            # to remove the temp line and ensure indices are correct.
-            # We will clear temp_line_index here, and it will be re-added later if needed.
-            self.temp_line_index = -1
-            self.update_listbox_display() # Rebuilds listbox and displayed_data_items
-            # After rebuilding, the previous highlights are no longer valid, so clear them
-            self.previous_highlights.clear()
-
-        # Revert previous highlights (only if listbox wasn't rebuilt)
-        if not temp_line_was_present: # Only revert if we didn't just rebuild the listbox
-            for index, original_bg, original_fg in self.previous_highlights:
-                if 0 <= index < self.listbox.size():
-                    self.listbox.itemconfig(index, {'bg': original_bg, 'fg': original_fg})
-            self.previous_highlights.clear()
-
-        target_freq_khz = None
-        if current_flrig_freq_hz is not None:
-            target_freq_khz = current_flrig_freq_hz / 1000
+        self.last_rig_freqs_hz = rig_freqs_hz
+
+        # At the minute rollover only rebuild the "Only active" view if stations went on or off air
+        if minute_changed and self.displayed_active_bits is not None:
+            if self.engine.activity_index.active_at(*self.active_filter_time()) != self.displayed_active_bits:
+                self.update_listbox_display()
+        if minute_changed and self.scanner is not None and self.engine.activity_index.active_at(*current_week_time()) != self.scan_active_bits:
+            self.update_scan_plan()
 
+        highlight_started = time.perf_counter()
         current_utc_weekday = now_utc.weekday()
-        exact_match_found = False
-        first_exact_match_index = -1
-        closest_freq_index = -1
-        closest_freq_diff = float('inf')
-
-        default_listbox_bg = self.listbox.cget("bg")
-        default_listbox_fg = self.listbox.cget("fg")
-
-        new_highlights = [] # To store highlights for the current cycle
-
-        for i, data_item in enumerate(self.displayed_data_items):
-            list_freq_khz = None
-            if self.current_file_type == "EIBI":
-                list_freq_khz = data_item.get("kHz")
-            elif self.current_file_type == "ILG":
-                list_freq_khz = data_item.get("FREQkhz")
-            
-            if target_freq_khz is not None and list_freq_khz is not None:
-                diff = abs(list_freq_khz - target_freq_khz)
-
-                if diff < closest_freq_diff:
-                    closest_freq_diff = diff
-                    closest_freq_index = i
-
-                if diff < 0.01: # Frequency matches
-                    exact_match_found = True
-                    if first_exact_match_index == -1:
-                        first_exact_match_index = i
-
-                    # Always store default colors for reversion
-                    new_highlights.append((i, default_listbox_bg, default_listbox_fg))
-
-                    # Default highlight for frequency match is grey
-                    self.listbox.itemconfig(i, {'bg': 'dark grey', 'fg': 'white'})
-
-                    # Now, check for time/day match to override with yellow
-                    is_active = True
-                    if self.current_file_type == "EIBI":
-                        time_range_str = data_item.get("Time(UTC)", "")
-                        days_str = data_item.get("Days", "")
-                        time_valid = self._is_time_valid(time_range_str, now_utc)
-                        day_valid = self._is_day_valid(days_str, current_utc_weekday)
-                        if not time_valid or not day_valid:
-                            is_active = False
-                    elif self.current_file_type == "ILG":
-                        time_range_str = data_item.get("TIMES:UTC", "")
-                        days_str = data_item.get("1=Sun", "")
-                        time_valid = self._is_time_valid(time_range_str, now_utc)
-                        day_valid = self._is_day_valid(days_str, current_utc_weekday)
-                        if not time_valid or not day_valid:
-                            is_active = False
-                    
-                    if is_active:
-                        self.listbox.itemconfig(i, {'bg': 'yellow', 'fg': 'black'})
-        
-        self.previous_highlights = new_highlights # Store highlights for next cycle
+        current_minute = now_utc.hour * 60 + now_utc.minute
+        new_styles = {} # Displayed row -> (bg, fg) for this cycle
+        markers = []
+        center_on = {} # Rig -> its first matching displayed row or its marker
+
+        for rig in sorted(rig_freqs_hz):
+            target_freq_khz = rig_freqs_hz[rig] / 1000
+            active_style, inactive_style, marker_style = RIG_STYLES[rig % len(RIG_STYLES)]
+            exact_match_indices = self.frequency_index.exact_matches(target_freq_khz)
+            for i in exact_match_indices:
+                # A row matching several rigs keeps the colour of the first one
+                if i in new_styles:
+                    continue
+                # Highlight for frequency match is grey, coloured if the station is on air
+                if is_schedule_active(self.engine.table.schedule(self.displayed_rows[i]), current_utc_weekday, current_minute):
+                    new_styles[i] = active_style
+                else:
+                    new_styles[i] = inactive_style
 
-        item_to_center_index = -1
+            if exact_match_indices:
+                center_on[rig] = exact_match_indices[0]
+            else:
+                # Temporary line showing the rig frequency where it would be in the list
+                insert_index = self.frequency_index.insertion_point(target_freq_khz)
+                marker_text = f"---- {target_freq_khz:.2f}" if rig == 0 else f"---- {target_freq_khz:.2f} (rig {rig + 1})"
+                markers.append((insert_index, marker_text, marker_style))
+                center_on[rig] = markers[-1]
 
-        if target_freq_khz is not None and not exact_match_found:
-            insert_index = 0
-            if closest_freq_index != -1 and self.displayed_data_items:
-                for i, data_item in enumerate(self.displayed_data_items):
-                    list_freq_khz = None
-                    if self.current_file_type == "EIBI":
-                        list_freq_khz = data_item.get("kHz")
-                    elif self.current_file_type == "ILG":
-                        list_freq_khz = data_item.get("FREQkhz")
-                    if list_freq_khz is not None and list_freq_khz > target_freq_khz:
-                        insert_index = i
-                        break
-                    insert_index = i + 1
-
-            self.listbox.insert(insert_index, f"---- {target_freq_khz:.2f}")
-            self.listbox.itemconfig(insert_index, {'bg': 'black', 'fg': 'yellow'})
-            self.temp_line_index = insert_index
-            item_to_center_index = insert_index
-        elif target_freq_khz is not None:
-            item_to_center_index = first_exact_match_index
+        # Only rows whose colours changed and moved marker lines are touched
+        self.highlighter.apply(new_styles, markers)
+
+        item_to_center_index = -1
+        follow_rig = self.follow_rig if self.follow_rig in center_on else min(center_on, default=None)
+        if follow_rig is None or not center:
+            pass
+        elif isinstance(center_on[follow_rig], tuple):
+            # Marker number i (in row order) is list line insert_index + i
+            marker = center_on[follow_rig]
+            item_to_center_index = marker[0] + self.highlighter.markers.index(marker)
+        else:
+            item_to_center_index = self.highlighter.position(center_on[follow_rig])
 
         if item_to_center_index != -1:
             self.listbox.see(item_to_center_index)
@@ -638,115 +1093,127 @@ class EibiTuner(tk.Frame):
             visible_lines = last_visible_idx - first_visible_idx
             scroll_offset = item_to_center_index - first_visible_idx - (visible_lines // 2)
             self.listbox.yview_scroll(scroll_offset, 'units')
-        elif target_freq_khz is not None:
-            print(f"No relevant frequency found for centering {target_freq_khz} kHz.")
-
-        if self.mode == "View":
-            self.after_id = self.master.after(1000, self.update_view_mode_display)
-
-
-
-
-
-
-
-
-
+        elif rig_freqs_hz and center:
+            print(f"No relevant frequency found for centering {rig_freqs_hz[min(rig_freqs_hz)] / 1000} kHz.")
+        TIMINGS.add("highlight", time.perf_counter() - highlight_started)
+
+        self.update_timeline_display(rig_freqs_hz)
+        self.schedule_view_mode_display()
+
+    def update_timeline_display(self, rig_freqs_hz):
+        # "6070.00 kHz  now: ... | next: ... | ended: ..." for the rig the list follows
+        follow_rig = self.follow_rig if self.follow_rig in rig_freqs_hz else min(rig_freqs_hz, default=None)
+        if follow_rig is None or not len(self.engine.table):
+            self.timeline_label.config(text="")
+            return
+        freq_khz = rig_freqs_hz[follow_rig] / 1000
+        weekday, minute_of_day = current_week_time()
+        week_minute = weekday * 1440 + minute_of_day
+        timeline = self.engine.timeline(freq_khz)
+
+        on_air = timeline.on_air(week_minute)
+        if on_air:
+            until = min((until for row, since, until in on_air if until is not None), default=None)
+            now_text = self.timeline_titles(on_air) + (f" (until {format_week_minute(until)})" if until is not None else " (all week)")
+        else:
+            now_text = "-"
+        next_up = timeline.next_up(week_minute)
+        if next_up:
+            minutes, entries = next_up
+            next_text = f"{self.timeline_titles(entries)} at {format_week_minute(week_minute + minutes)} (in {format_minutes(minutes)})"
+        else:
+            next_text = "-"
+        just_ended = timeline.just_ended(week_minute)
+        if just_ended:
+            minutes, entries = just_ended
+            ended_text = f"{self.timeline_titles(entries)} at {format_week_minute(week_minute - minutes)} ({format_minutes(minutes)} ago)"
+        else:
+            ended_text = "-"
+        self.timeline_label.config(text=f"{freq_khz:.2f} kHz  now: {now_text} | next: {next_text} | ended: {ended_text}")
 
+    def timeline_titles(self, entries):
+        # "A, B, C +2" for the entries of one part of the timeline line
+        titles = list(dict.fromkeys(self.engine.entry_title(row) for row, since, until in entries))
+        text = ", ".join(titles[:TIMELINE_MAX_TITLES])
+        if len(titles) > TIMELINE_MAX_TITLES:
+            text += f" +{len(titles) - TIMELINE_MAX_TITLES}"
+        return text
 
     def on_search_filter_change(self, event):
         # The filter_term is already updated via textvariable binding
+        if self.search_after_id is not None:
+            self.master.after_cancel(self.search_after_id)
+            self.search_after_id = None
         self.update_listbox_display()
         self.update_view_mode_display(force_update=True)
 
+    def on_search_typed(self, *args):
+        # Search as you type, once typing pauses for SEARCH_DEBOUNCE_MS
+        if self.search_after_id is not None:
+            self.master.after_cancel(self.search_after_id)
+        self.search_after_id = self.master.after(SEARCH_DEBOUNCE_MS, self.on_search_filter_change, None)
+
     def on_active_only_toggle(self):
-        if hasattr(self, 'current_filepath') and self.current_filepath:
-            if self.current_file_type == "EIBI":
-                self._load_eibi_file_csv(self.current_filepath)
-            elif self.current_file_type == "ILG":
-                self.load_ilg_file(self.current_filepath)
+        # The active filter is a lookup in the activity index, no need to reload the file
+        self.update_listbox_display()
+        self.update_view_mode_display(force_update=True)
+
+    def on_active_at_change(self, event):
+        if self.active_only_var.get():
+            self.on_active_only_toggle()
 
     def on_target_filter_change(self, event):
-        if hasattr(self, 'current_filepath') and self.current_filepath:
-            if self.current_file_type == "EIBI":
-                self._load_eibi_file_csv(self.current_filepath)
-            elif self.current_file_type == "ILG":
-                self.load_ilg_file(self.current_filepath)
+        # Filters are views over the loaded rows, the file is not read again
+        self.update_listbox_display()
+        self.update_view_mode_display(force_update=True)
 
-    def update_listbox_display(self):
-        self.listbox.delete(0, tk.END)
-        self.displayed_data_items.clear() # Clear the list of displayed data items
-
-        for data_item in self.all_data_lines:
-            display_line = ""
-            if self.current_file_type == "EIBI":
-                # Format EIBI data to display all columns using calculated widths
-                formatted_parts = []
-                for col_name in self.eibi_column_names:
-                    value = data_item.get(col_name, "")
-                    width = self.eibi_column_widths.get(col_name, 15) # Default to 15 if width not found
-                    if col_name == "kHz":
-                        formatted_parts.append(f"{value:<{width}.2f}") # Format frequency specifically
-                    else:
-                        formatted_parts.append(f"{str(value):<{width}}")
-                display_line = "".join(formatted_parts)
-            elif self.current_file_type == "ILG":
-                # Format ILG data to display all columns using calculated widths
-                formatted_parts = []
-                for col_name in self.ilg_column_names:
-                    value = data_item.get(col_name, "")
-                    width = self.ilg_column_widths.get(col_name, 15) # Default to 15 if width not found
-                    if col_name == "FREQkhz":
-                        formatted_parts.append(f"{value:<{width}.2f}") # Format frequency specifically
-                    else:
-                        formatted_parts.append(f"{str(value):<{width}}")
-                display_line = "".join(formatted_parts)
-            
-            filter_value = self.filter_term.get().lower()
-            should_display = False
-
-            if not filter_value: # No filter, display all
-                should_display = True
-            elif self.current_file_type == "EIBI":
-                if filter_value in display_line.lower():
-                    should_display = True
-            elif self.current_file_type == "ILG":
-                # Search within all values of the data_item for ILG
-                for value in data_item.values():
-                    if filter_value in str(value).lower():
-                        should_display = True
-                        break
-            
-            if should_display:
-                self.displayed_data_items.append(data_item) # Store the actual data_item
-                self.listbox.insert(tk.END, display_line)
+    def search_rows(self, filter_value):
+        # Rows passing all filters, the active rows are kept to spot a rollover later
+        self.displayed_active_bits = None
+        active_time = None
+        if self.active_only_var.get():
+            active_time = self.active_filter_time()
+            self.displayed_active_bits = self.engine.activity_index.active_at(*active_time)
+        bits = self.engine.filtered_bits(active_time, self.target_filter_var.get())
+        return self.engine.search_rows(bits, filter_value)
+
+    def build_search_keys(self):
+        # Make the search keys of the loaded file a thousand rows at a time,
+        # so the first search does not have to
+        self.search_keys_after_id = None
+        if self.load_chunks is None and len(self.engine.table) and not self.engine.render_cache().build_keys(SEARCH_KEYS_STEP):
+            self.search_keys_after_id = self.master.after(1, self.build_search_keys)
+
+    def displayed_line(self, index):
+        # Text of a displayed row, formatted when the list draws it
+        return self.engine.render_cache().line(self.displayed_rows[index])
 
-    def update_header_and_listbox_display(self):
+    def update_listbox_display(self):
+        filter_started = time.perf_counter()
+        self.displayed_rows = self.search_rows(self.filter_term.get().lower())
+        # The list only formats the rows it actually shows
+        self.listbox.set_rows(len(self.displayed_rows), self.displayed_line)
+        self.highlighter.reset()
+
+        # Keep the frequency index in step with the rows shown in the listbox
+        self.frequency_index = self.engine.frequency_index_of(self.displayed_rows)
+        TIMINGS.add("filter", time.perf_counter() - filter_started)
+        self.update_scan_plan()
+
+    def update_header_display(self):
         self.header_listbox.delete(0, tk.END) # Clear previous header
-        header_text = ""
-        header_width = 0
-
-        if self.current_file_type == "EIBI":
-            # Dynamically create header from eibi_column_names using calculated widths
-            header_parts = []
-            for col_name in self.eibi_column_names:
-                width = self.eibi_column_widths.get(col_name, len(col_name) + 2) # Default to name length + padding
-                header_parts.append(f"{col_name:<{width}}")
-            header_text = "".join(header_parts)
-            header_width = len(header_text)
-        elif self.current_file_type == "ILG":
-            # Dynamically create header from ilg_column_names using calculated widths
-            header_parts = []
-            for col_name in self.ilg_column_names:
-                width = self.ilg_column_widths.get(col_name, len(col_name) + 2) # Default to name length + padding
-                header_parts.append(f"{col_name:<{width}}")
-            header_text = "".join(header_parts)
-            header_width = len(header_text)
-        
+        # Header from the column names of the loaded file using calculated widths
+        header_text = self.engine.header_line()
+        header_width = len(header_text)
+
         if header_text:
             self.header_listbox.insert(tk.END, header_text)
 
         self.separator_label.config(text="=" * header_width)
+        self.listbox.set_content_width(header_width)
+
+    def update_header_and_listbox_display(self):
+        self.update_header_display()
         self.update_listbox_display()
 
     def show_about_dialog(self):